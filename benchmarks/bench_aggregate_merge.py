@@ -0,0 +1,91 @@
+"""
+Benchmark how the cost of merging statement files into a bank aggregate
+scales with the number of files, comparing the per-file read/rewrite mode
+with the single-pass batched merge.
+
+Usage:
+    python benchmarks/bench_aggregate_merge.py [--rows 500] [--files 1 5 10 25 50]
+
+Only the merge into the aggregate is timed, parsing the files is excluded.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import split_exports, write_wells_fargo
+
+
+def write_activity_files(directory: Path, n_files: int, rows: int):
+    """
+    Write Wells Fargo style account activity CSVs (no header) to directory.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(n_files)
+    write_wells_fargo(directory, split_exports(rng, rows * n_files, n_files))
+
+
+def run(n_files: int, rows: int) -> tuple[float, float]:
+    """
+    Parse n_files files and merge them into a fresh aggregate, first one file
+    at a time and then in a single batch. Returns the elapsed merge seconds
+    for each mode; parsing is excluded from the timings.
+    """
+    import expense_tracker.utils.parser as parser_module
+    from expense_tracker.wells_fargo.parser import WellsFargoAccountSummaryParser
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        write_activity_files(data_dir / "WellsFargo" / "AccountActivity", n_files, rows)
+        # Parsers resolve data/ relative to the working directory at import time
+        parser_module.data_path = data_dir
+        files = sorted((data_dir / "WellsFargo" / "AccountActivity").iterdir())
+
+        def load_parsers():
+            parsers = []
+            for file in files:
+                parser = WellsFargoAccountSummaryParser(file.name)
+                # Keep every row so the aggregate grows with the file count
+                parser.add_new_only = False
+                parser.load_df()
+                parsers.append(parser)
+            return parsers
+
+        parsers = load_parsers()
+        start = time.perf_counter()
+        for parser in parsers:
+            parser.save_to_aggregate()
+        per_file = time.perf_counter() - start
+
+        parsers[0].aggregate_file.unlink()
+        parsers = load_parsers()
+        start = time.perf_counter()
+        WellsFargoAccountSummaryParser.save_batch_to_aggregate(parsers)
+        batched = time.perf_counter() - start
+        return per_file, batched
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--rows", type=int, default=500)
+    arg_parser.add_argument("--files", type=int, nargs="+", default=[1, 5, 10, 25, 50])
+    args = arg_parser.parse_args()
+
+    import logging
+
+    from expense_tracker.utils.logger import LOGGER
+
+    LOGGER.setLevel(logging.WARNING)
+    print(f"{'files':>6} {'per-file (s)':>14} {'batched (s)':>12} {'speedup':>8}")
+    for n_files in args.files:
+        per_file, batched = run(n_files, args.rows)
+        print(
+            f"{n_files:>6} {per_file:>14.3f} {batched:>12.3f} "
+            f"{per_file / batched:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
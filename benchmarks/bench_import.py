@@ -0,0 +1,104 @@
+"""
+Benchmark cold start: the time to import each entry point of the package in
+a fresh interpreter, and which heavy optional libraries that pulls in.
+CSV-only code paths should not load the PDF stack, and the CLI and the
+dashboard module should import in well under a second.
+
+Usage:
+    python benchmarks/bench_import.py [--repeat 5] [--max-seconds 1.0]
+        [--output results.json]
+
+Exits with status 1 if any entry point takes longer than --max-seconds.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+results_path = Path(__file__).parent / "results"
+
+MODULES = [
+    "expense_tracker.main",
+    "expense_tracker.chase.parser",
+    "expense_tracker.capital_one.parser",
+    "expense_tracker.wells_fargo.parser",
+    "expense_tracker.app",
+]
+# Libraries that are slow to import and only needed for PDFs or charts
+HEAVY = ["camelot", "cv2", "pdfminer", "pypdfium2", "tabula", "altair", "plotly"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": seconds, "heavy": heavy}}))
+"""
+
+
+def probe(module: str) -> dict:
+    """
+    Import a module in a fresh interpreter and report the import time.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--max-seconds", type=float, default=1.0)
+    arg_parser.add_argument("--output", type=Path, default=None)
+    args = arg_parser.parse_args()
+
+    timings = {}
+    print(f"{'module':<40} {'best (s)':>9} {'mean (s)':>9}  heavy imports")
+    for module in MODULES:
+        runs = [probe(module) for _ in range(args.repeat)]
+        seconds = [run["seconds"] for run in runs]
+        timings[module] = {
+            "best": min(seconds),
+            "mean": statistics.mean(seconds),
+            "runs": seconds,
+            "heavy": runs[-1]["heavy"],
+        }
+        print(
+            f"{module:<40} {min(seconds):>9.3f} {statistics.mean(seconds):>9.3f}  "
+            f"{', '.join(runs[-1]['heavy']) or '-'}"
+        )
+
+    name = f"import-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output = args.output or results_path / name
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "benchmark": "import",
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "timings": timings,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Results saved to {output}")
+    slow = [m for m, t in timings.items() if t["best"] > args.max_seconds]
+    if slow:
+        print(f"Slower than {args.max_seconds:g}s: {', '.join(slow)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
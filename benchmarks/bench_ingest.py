@@ -0,0 +1,292 @@
+"""
+Benchmark ingestion and dashboard loading end to end on a synthetic data/
+tree (see synthetic.py), and save the timings as JSON so runs can be
+compared before and after a change.
+
+Usage:
+    python benchmarks/bench_ingest.py [--rows 10000] [--files 10] [--pdfs 2]
+        [--repeat 3] [--workers 1] [--output results.json] [--compare base.json]
+
+Timed stages, best of --repeat runs:
+    fetch_data.cold         full ingestion into empty aggregates
+    fetch_data.warm         re-running ingestion with nothing new to parse
+    load_df.<Parser>        parsing every file of a bank, without saving
+    merge.<bank>.<type>     merging the parsed files into the bank aggregate
+    merge.global.<bank>...  merging the bank aggregate into the global one
+    dashboard.load_rollups  loading the global aggregate and its rollups
+    dashboard.month_view    preparing the latest month's charts and first page
+
+The per-stage ingestion report of the last cold run is saved along with
+the timings. STORAGE_BACKEND, INGEST_WORKERS etc. apply as usual.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from synthetic import BANKS, generate
+
+results_path = Path(__file__).parent / "results"
+
+
+def clean(data_dir: Path):
+    """
+    Remove everything ingestion wrote under data/, keeping the statements.
+    """
+    for path in sorted(data_dir.rglob("*"), reverse=True):
+        statement = (
+            len(path.relative_to(data_dir).parts) == 3
+            and path.suffix.lower() in (".csv", ".pdf")
+            and not any(part.startswith(".") for part in path.parts)
+        )
+        if path.is_file() and not statement:
+            path.unlink()
+        elif path.is_dir() and path.name.startswith("."):
+            shutil.rmtree(path)
+
+
+def timed(
+    timings: dict, name: str, fn: Callable, repeat: int, setup: Callable | None = None
+):
+    """
+    Run fn repeat times, after setup if given, and record the timings.
+    Returns the result of the last run.
+    """
+    runs = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    record(timings, name, runs)
+    return result
+
+
+def record(timings: dict, name: str, runs: list[float]):
+    timings[name] = {
+        "best": min(runs),
+        "mean": statistics.mean(runs),
+        "runs": runs,
+    }
+    print(f"{name:<40} {min(runs):>10.3f}s")
+
+
+def bench_ingest(timings: dict, data_dir: Path, repeat: int, workers: int) -> dict:
+    """
+    Time fetch_data cold and warm. Returns the ingestion report of the last
+    cold run.
+    """
+    from expense_tracker.main import fetch_data
+    from expense_tracker.utils.metrics import METRICS
+
+    timed(
+        timings,
+        "fetch_data.cold",
+        lambda: fetch_data(workers),
+        repeat,
+        setup=lambda: clean(data_dir),
+    )
+    report = METRICS.report()
+    timed(timings, "fetch_data.warm", lambda: fetch_data(workers), repeat)
+    return report
+
+
+def bench_parsers(timings: dict, data_dir: Path, repeat: int):
+    """
+    Time each parser's load_df over its files, then the merges of the
+    parsed files into the bank and global aggregates.
+    """
+    from expense_tracker.main import DATA_TYPES
+    from expense_tracker.utils.processing import get_parser_class
+
+    loaded = []
+    for bank in BANKS:
+        for data_type in DATA_TYPES:
+            directory = data_dir / bank / data_type
+            if not directory.is_dir():
+                continue
+            try:
+                parser_class = get_parser_class(bank, data_type)  # type: ignore
+            except ValueError:
+                continue
+            files = sorted(
+                file.name
+                for file in directory.iterdir()
+                if file.suffix.lower() in (".csv", ".pdf")
+            )
+
+            def load_all():
+                parsers = [parser_class(file, bank, data_type) for file in files]
+                for parser in parsers:
+                    parser.load_df()
+                return parsers
+
+            parsers = timed(
+                timings,
+                f"load_df.{parser_class.__name__}",
+                load_all,
+                repeat,
+                # Parse PDFs again instead of reading their cached tables
+                setup=lambda: shutil.rmtree(data_dir / ".cache", ignore_errors=True),
+            )
+            loaded.append((bank, data_type, parser_class, parsers))
+
+    # Each repeat merges into empty aggregates, like a first ingestion
+    runs: dict[str, list[float]] = {}
+    for _ in range(repeat):
+        clean(data_dir)
+        for bank, data_type, parser_class, parsers in loaded:
+            start = time.perf_counter()
+            parser_class.save_batch_to_aggregate(parsers)
+            merged = time.perf_counter()
+            parsers[-1].save_to_global_aggregate()
+            end = time.perf_counter()
+            name = f"{bank}.{data_type}"
+            runs.setdefault(f"merge.{name}", []).append(merged - start)
+            runs.setdefault(f"merge.global.{name}", []).append(end - merged)
+    for name, merge_runs in runs.items():
+        record(timings, name, merge_runs)
+
+
+def bench_dashboard(timings: dict, repeat: int):
+    """
+    Time the dashboard's data preparation, without Streamlit's caching.
+    """
+    try:
+        from expense_tracker.app import (
+            DEFAULT_START,
+            GLOBAL_DATASET,
+            format_amount_col,
+            load_rollups,
+        )
+        from expense_tracker.query import Query
+        from expense_tracker.utils.storage import get_storage
+    except ImportError as e:
+        print(f"Skipping dashboard benchmarks ({e}), install the dashboard extra.")
+        return
+    version = get_storage().version(GLOBAL_DATASET)
+    # The dashboard's default filters
+    query = Query(start=DEFAULT_START)
+    rollups = timed(
+        timings,
+        "dashboard.load_rollups",
+        lambda: load_rollups.__wrapped__(version, query),
+        repeat,
+    )
+
+    def month_view():
+        format_amount_col(rollups.monthly.copy(), "Spending")
+        if not rollups.months:
+            return
+        month = rollups.months[-1]
+        data = rollups.month_data(month).sort_values(by="Date", ascending=False)
+        rollups.month_categories(month)
+        format_amount_col(data.iloc[:100].copy())
+
+    timed(timings, "dashboard.month_view", month_view, repeat)
+
+
+def compare(current: dict, baseline_file: Path):
+    """
+    Print the speedup of each stage over a baseline results file.
+    """
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    print(f"\n{'stage':<40} {'baseline':>10} {'current':>10} {'speedup':>8}")
+    for name, timing in current["timings"].items():
+        if name not in baseline["timings"]:
+            continue
+        before = baseline["timings"][name]["best"]
+        after = timing["best"]
+        print(
+            f"{name:<40} {before:>9.3f}s {after:>9.3f}s "
+            f"{before / after if after else float('inf'):>7.1f}x"
+        )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    arg_parser.add_argument("--rows", type=int, default=10_000, help="Rows per bank.")
+    arg_parser.add_argument("--files", type=int, default=10, help="Files per bank.")
+    arg_parser.add_argument("--pdfs", type=int, default=2, help="Statement PDFs.")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", type=Path, default=None)
+    arg_parser.add_argument("--compare", type=Path, default=None)
+    args = arg_parser.parse_args()
+
+    name = f"ingest-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output = (args.output or results_path / name).resolve()
+    baseline = args.compare.resolve() if args.compare else None
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        start = time.perf_counter()
+        generate(root, args.rows, args.files, args.pdfs, args.seed)
+        print(f"Generated data in {time.perf_counter() - start:.1f}s")
+        # Paths under configs/ and data/ are resolved from the working
+        # directory when expense_tracker is imported
+        os.chdir(root)
+        import logging
+
+        import pandas as pd
+
+        from expense_tracker.utils.logger import LOGGER
+
+        LOGGER.setLevel(logging.WARNING)
+        workers = args.workers or int(os.environ.get("INGEST_WORKERS") or 1)
+        timings: dict = {}
+        report = bench_ingest(timings, root / "data", args.repeat, workers)
+        bench_parsers(timings, root / "data", args.repeat)
+        # Leave a complete ingestion behind for the dashboard
+        clean(root / "data")
+        from expense_tracker.main import fetch_data
+
+        fetch_data(workers)
+        bench_dashboard(timings, args.repeat)
+
+    results = {
+        "benchmark": "ingest",
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "params": {
+            "rows": args.rows,
+            "files": args.files,
+            "pdfs": args.pdfs,
+            "repeat": args.repeat,
+            "workers": workers,
+            "seed": args.seed,
+            "storage_backend": os.environ.get("STORAGE_BACKEND") or "tsv",
+            "stream_chunk_rows": int(os.environ.get("STREAM_CHUNK_ROWS") or 0),
+        },
+        "environment": {
+            "python": sys.version.split()[0],
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "timings": timings,
+        "ingest_report": report,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {output}")
+    if baseline is not None:
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark description searches over a synthetic global aggregate, comparing
+a str.contains scan of the loaded data (and of the dataset, loading it
+first) with the SQLite FTS5 search index: totals and the first page of
+results as the dashboard shows them, and all the results.
+
+Usage:
+    python benchmarks/bench_search.py [--rows 500000] [--repeat 5]
+        [--output results.json]
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from synthetic import BANKS, transactions
+
+from expense_tracker.search import SearchIndex
+from expense_tracker.utils.storage import get_storage
+from expense_tracker.utils.text_ops import transaction_ids
+
+results_path = Path(__file__).parent / "results"
+# Merchants, and one store of a merchant
+SEARCHES = ["whole foods", "amazon", "uber", "netflix.com", "starbucks store #123"]
+# Rows per page of the dashboard
+PAGE_SIZE = 100
+
+
+def history(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a global aggregate of rows transactions over three years,
+    spread across the banks and a few cards.
+    """
+    rng = random.Random(seed)
+    drawn = transactions(rng, rows, date(2023, 1, 1), 3 * 365)
+    df = pd.DataFrame(drawn, columns=["Date", "Description", "Category", "Amount"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["Amount"] = np.rint(df["Amount"] * 100).astype(np.int64)
+    df["Bank"] = [rng.choice(BANKS) for _ in range(rows)]
+    df["Card"] = [rng.choice([1234, 9088, 9992]) for _ in range(rows)]
+    df["ID"] = transaction_ids(df)
+    return df.sort_values(by=["Date", "Description"], ignore_index=True)
+
+
+def best_of(fn: Callable, repeat: int) -> tuple[float, list[float]]:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return min(runs), runs
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    arg_parser.add_argument("--rows", type=int, default=500_000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--backend", default="parquet")
+    arg_parser.add_argument("--output", type=Path, default=None)
+    args = arg_parser.parse_args()
+
+    storage = get_storage(args.backend)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = Path(tmp) / "global_aggregate"
+        storage.write(dataset, history(args.rows))
+        index = SearchIndex(dataset, storage)
+        start = time.perf_counter()
+        index.sync()
+        build = time.perf_counter() - start
+        print(f"Indexed {args.rows} rows in {build:.2f}s")
+        data = storage.read(dataset)
+
+        def scan(df: pd.DataFrame, text: str) -> tuple[pd.DataFrame, int]:
+            found = df[df["Description"].str.contains(text, case=False, regex=False)]
+            return found, int(found["Amount"].sum())
+
+        print(
+            f"{'search':<22} {'rows':>7} {'load+scan (ms)':>15} {'scan (ms)':>10} "
+            f"{'index page (ms)':>16} {'index all (ms)':>15}"
+        )
+        for text in SEARCHES:
+            found, total = scan(data, text)
+            hits = index.search(text)
+            if set(hits["ID"]) != set(found["ID"]):
+                raise AssertionError(f"{text}: the index finds other transactions")
+            if int(index.totals(text)["Amount"].iloc[0]) != total:
+                raise AssertionError(f"{text}: the index totals differ")
+            load_best, load_runs = best_of(
+                lambda: scan(storage.read(dataset), text), args.repeat
+            )
+            scan_best, scan_runs = best_of(lambda: scan(data, text), args.repeat)
+            page_best, page_runs = best_of(
+                lambda: (index.totals(text), index.search(text, limit=PAGE_SIZE)),
+                args.repeat,
+            )
+            all_best, all_runs = best_of(
+                lambda: (index.totals(text), index.search(text)), args.repeat
+            )
+            results[text] = {
+                "rows": len(found),
+                "load_and_scan": {"best": load_best, "runs": load_runs},
+                "scan": {"best": scan_best, "runs": scan_runs},
+                "index_page": {"best": page_best, "runs": page_runs},
+                "index_all": {"best": all_best, "runs": all_runs},
+            }
+            print(
+                f"{text:<22} {len(found):>7} {load_best * 1000:>15.1f} "
+                f"{scan_best * 1000:>10.1f} {page_best * 1000:>16.1f} "
+                f"{all_best * 1000:>15.1f}"
+            )
+
+    name = f"search-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output = args.output or results_path / name
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "benchmark": "search",
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "rows": args.rows,
+                "backend": args.backend,
+                "index_build": build,
+                "searches": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
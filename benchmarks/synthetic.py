@@ -0,0 +1,240 @@
+"""
+Generate a synthetic data/ tree with realistic statement exports for every
+supported bank format, for benchmarks and manual testing:
+
+- Chase account activity CSVs (header, Transaction Date first, negative charges)
+- Capital One account activity CSVs (header, card name ending in its number)
+- Wells Fargo account activity CSVs (no header, quoted fields)
+- Wells Fargo statement PDFs (a transaction table per page)
+
+Usage:
+    python benchmarks/synthetic.py <root> [--rows 10000] [--files 10] [--pdfs 2]
+
+Rows are per bank and split across its files. Consecutive exports overlap
+by a few rows, as real downloads do, so deduplication is exercised too.
+"""
+
+import argparse
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+BANKS = ["Chase", "CapitalOne", "WellsFargo"]
+# Merchants per category, matching configs/categories-sample.json
+MERCHANTS = {
+    "Groceries": ["WHOLE FOODS MARKET", "TRADER JOE'S", "SAFEWAY", "KROGER"],
+    "Dining": ["STARBUCKS STORE", "DOORDASH", "CHIPOTLE", "TST* LOCAL CAFE"],
+    "Transportation": ["SHELL OIL", "CHEVRON", "UBER TRIP", "LYFT RIDE"],
+    "Subscriptions": ["NETFLIX.COM", "SPOTIFY USA", "APPLE.COM/BILL"],
+    "Shopping": ["AMAZON MKTPL", "AMZN DIGITAL", "TARGET", "COSTCO WHSE"],
+    "Other": ["ACME HARDWARE", "CITY PARKING", "PHARMACY", "BOOKSTORE"],
+}
+CATEGORIES = {
+    "Groceries": "Groceries",
+    "Dining": "Food & Drink",
+    "Transportation": "Gas",
+    "Subscriptions": "Bills & Utilities",
+    "Shopping": "Shopping",
+    "Other": "Merchandise",
+}
+# Histories end here, inside the window shown by the dashboard
+END = date(2025, 12, 31)
+# Fraction of each export repeated at the start of the next one
+OVERLAP = 0.02
+
+
+def transactions(
+    rng: random.Random, n: int, start: date, days: int
+) -> list[tuple[date, str, str, float]]:
+    """
+    Draw n card transactions (date, description, category, amount) over
+    the given days, newest first as banks export them. About one in a
+    hundred is a same-day repeat of the previous purchase.
+    """
+    rows = []
+    for _ in range(n):
+        if rows and rng.random() < 0.01:
+            rows.append(rows[-1])
+            continue
+        category = rng.choice(list(MERCHANTS))
+        merchant = f"{rng.choice(MERCHANTS[category])} #{rng.randint(1, 9999)}"
+        day = start + timedelta(days=rng.randrange(days))
+        rows.append((day, merchant, category, rng.randint(100, 25000) / 100))
+    rows.sort(key=lambda row: row[0], reverse=True)
+    return rows
+
+
+def split_exports(
+    rng: random.Random, rows: int, files: int
+) -> list[list[tuple[date, str, str, float]]]:
+    """
+    Split a bank's history into consecutive exports of about rows / files
+    transactions each, the later ones repeating the newest rows of the
+    previous export. The history spans up to three years, ending at END.
+    """
+    per_file = max(rows // files, 1)
+    span = min(max(rows // 20, 28), 3 * 365)
+    days = max(span // files, 1)
+    start = END - timedelta(days=days * files - 1)
+    exports = []
+    for i in range(files):
+        export = transactions(rng, per_file, start + timedelta(days=i * days), days)
+        if exports:
+            overlap = int(len(exports[-1]) * OVERLAP)
+            export = export + exports[-1][:overlap]
+        exports.append(export)
+    return exports
+
+
+def write_chase(directory: Path, exports: list, card: int = 9088):
+    for i, export in enumerate(exports):
+        with open(directory / f"Chase{card}_Activity{i:04d}.CSV", "w") as f:
+            f.write(
+                "Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+            )
+            for day, description, category, amount in export:
+                posted = day + timedelta(days=1)
+                f.write(
+                    f"{day:%m/%d/%Y},{posted:%m/%d/%Y},{description},"
+                    f"{CATEGORIES[category]},Sale,{-amount:.2f},\n"
+                )
+
+
+def write_capital_one(directory: Path, exports: list, card: int = 1234):
+    for i, export in enumerate(exports):
+        with open(directory / f"Capital-One-{i:04d}.csv", "w") as f:
+            f.write("Date,Post Date,Card,Description,Category,Amount\n")
+            for day, description, category, amount in export:
+                posted = day + timedelta(days=1)
+                f.write(
+                    f"{day:%Y-%m-%d},{posted:%Y-%m-%d},Quicksilver ...{card},"
+                    f'"{description}",{CATEGORIES[category]},{amount:.2f}\n'
+                )
+
+
+def write_wells_fargo(directory: Path, exports: list, account: str = "Journey"):
+    for i, export in enumerate(exports):
+        with open(directory / f"{i:04d} {account}.csv", "w") as f:
+            for day, description, _, amount in export:
+                f.write(f'"{day:%m/%d/%Y}","{-amount:.2f}","*","","{description}"\n')
+
+
+def pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, pages: list[list[tuple[float, float, str]]]):
+    """
+    Write a minimal PDF with one Helvetica text item per (x, y, text) entry,
+    enough for camelot's stream flavor to find the table columns.
+    """
+    n_pages = len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids ["
+        + " ".join(f"{4 + 2 * i} 0 R" for i in range(n_pages))
+        + f"] /Count {n_pages} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, items in enumerate(pages):
+        stream = "\n".join(
+            f"BT /F1 8 Tf {x:.1f} {y:.1f} Td ({pdf_text(text)}) Tj ET"
+            for x, y, text in items
+        )
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    content = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(content))
+        content += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(content)
+    content += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    content += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    content += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    path.write_bytes(content)
+
+
+def write_statements(
+    directory: Path, rng: random.Random, n: int, pages: int = 2, card: int = 4031
+):
+    """
+    Write Wells Fargo statement PDFs, one per month, with a transaction table
+    (Card, Trans, Post, Reference, Description, Credits, Charges) per page.
+    """
+    columns = [40, 80, 120, 160, 260, 460, 530]
+    header = ["Card", "Trans", "Post", "Reference", "Description", "Credits", "Charges"]
+    for i in range(n):
+        months = END.year * 12 + END.month - 1 - (n - 1 - i)
+        month = date(months // 12, months % 12 + 1, 1)
+        rows = transactions(rng, 30 * pages, month, 28)
+        rows.reverse()
+        statement = []
+        for page in range(pages):
+            items = [(columns[0], 750, f"Statement page {page + 1}")]
+            items += [(x, 720, text) for x, text in zip(columns, header)]
+            for j, (day, description, _, amount) in enumerate(
+                rows[page * 30 : (page + 1) * 30]
+            ):
+                posted = day + timedelta(days=1)
+                cells = [
+                    str(card),
+                    f"{day:%m/%d}",
+                    f"{posted:%m/%d}",
+                    f"{rng.getrandbits(40):010X}",
+                    description,
+                    "",
+                    f"{amount:.2f}",
+                ]
+                y = 700 - 20 * j
+                items += [(x, y, text) for x, text in zip(columns, cells) if text]
+            statement.append(items)
+        write_pdf(directory / f"{month:%m%d%y} Statement.pdf", statement)
+
+
+def generate(root: Path, rows: int, files: int, pdfs: int = 0, seed: int = 0):
+    """
+    Write configs/ and data/ under root, with rows transactions per bank
+    split across files exports each, plus pdfs Wells Fargo statements.
+    """
+    rng = random.Random(seed)
+    configs = root / "configs"
+    configs.mkdir(parents=True, exist_ok=True)
+    (configs / "banks.json").write_text(json.dumps(BANKS))
+    sample = Path(__file__).parents[1] / "configs" / "categories-sample.json"
+    (configs / "categories.json").write_text(sample.read_text())
+    writers = {
+        "Chase": write_chase,
+        "CapitalOne": write_capital_one,
+        "WellsFargo": write_wells_fargo,
+    }
+    for bank, writer in writers.items():
+        directory = root / "data" / bank / "AccountActivity"
+        directory.mkdir(parents=True, exist_ok=True)
+        writer(directory, split_exports(rng, rows, files))
+    if pdfs:
+        directory = root / "data" / "WellsFargo" / "Statements"
+        directory.mkdir(parents=True, exist_ok=True)
+        write_statements(directory, rng, pdfs)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("root", type=Path)
+    arg_parser.add_argument("--rows", type=int, default=10_000)
+    arg_parser.add_argument("--files", type=int, default=10)
+    arg_parser.add_argument("--pdfs", type=int, default=2)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    generate(args.root, args.rows, args.files, args.pdfs, args.seed)
+
+
+if __name__ == "__main__":
+    main()
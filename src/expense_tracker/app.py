@@ -1,41 +1,102 @@
-from datetime import datetime
-from pathlib import Path
+import math
+import os
+from datetime import date
 
-import altair as alt
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
-from expense_tracker.main import fetch_data
+from expense_tracker.main import load_banks
+from expense_tracker.query import GLOBAL_DATASET, UNCATEGORIZED, Query
+from expense_tracker.search import SearchIndex
+from expense_tracker.utils.refresh import RefreshWorker
+from expense_tracker.utils.rollups import Rollups, SQLRollups
+from expense_tracker.utils.schema import apply_schema
+from expense_tracker.utils.storage import SQLiteStorage, get_storage
+from expense_tracker.utils.transforms import format_currency, to_dollars
+
+DASHBOARD_COLUMNS = ["Date", "Description", "Category", "Amount", "Card", "Bank"]
+# First date shown until another range is picked
+DEFAULT_START = date(2025, 4, 1)
+PAGE_SIZE = 100
 
 
 def format_amount_col(df: pd.DataFrame, col: str = "Amount") -> pd.DataFrame:
-    """Format a specified column in the DataFrame to display as currency."""
-    df[col] = df[col].astype(str)
-    df[col] = df[col].map(lambda x: f"${float(x):,.2f}")
+    """Format a specified column of amounts in cents to display as currency."""
+    df[col] = format_currency(df[col])
     return df
 
 
-def global_tab(tab, data: pd.DataFrame):
+@st.cache_resource(show_spinner=False)
+def get_refresh_worker() -> RefreshWorker | None:
+    """
+    Start the background ingestion thread once per server process.
+    Set DASHBOARD_REFRESH=off when ingestion runs elsewhere,
+    e.g. with `expense-tracker ingest --watch`.
+    """
+    if os.environ.get("DASHBOARD_REFRESH", "on") == "off":
+        return None
+    worker = RefreshWorker()
+    worker.start()
+    return worker
+
+
+def sidebar_query() -> Query:
+    """
+    Build the query of the filters picked in the sidebar.
+    """
+    with st.sidebar:
+        st.header("Filters")
+        dates = st.date_input("Dates", value=(DEFAULT_START, date.today()), key="dates")
+        banks = st.multiselect("Banks", load_banks(), key="banks")
+        description = st.text_input("Description contains", key="description")
+    # A range being picked has a single date
+    dates = [*dates, None, None] if isinstance(dates, tuple) else [dates, None]
+    return Query(
+        start=dates[0],
+        end=dates[1],
+        banks=banks or None,
+        description=description.strip() or None,
+    )
+
+
+@st.cache_data(show_spinner=False, hash_funcs={Query: repr})
+def load_rollups(version: str | None, query: Query) -> Rollups:
+    """
+    Load the rows of the global dataset that pass the query's filters and
+    precompute the dashboard rollups. The filters are pushed down to the
+    storage backend, so only the matching partitions or index ranges are
+    read. Cached per data version and filters, so this only runs again
+    when the global aggregate is rewritten or the filters change. With the
+    SQLite store the aggregates are computed by the database instead.
+    """
+    storage = get_storage()
+    if isinstance(storage, SQLiteStorage) and storage.exists(GLOBAL_DATASET):
+        return SQLRollups(storage, GLOBAL_DATASET, query, DASHBOARD_COLUMNS)
+    data = query.load(GLOBAL_DATASET, columns=DASHBOARD_COLUMNS, storage=storage)
+    for col in DASHBOARD_COLUMNS:
+        if col not in data.columns:
+            data[col] = pd.Series(dtype="datetime64[ns]" if col == "Date" else object)
+    data = data.copy()
+    data["Category"] = data["Category"].astype(object).fillna(UNCATEGORIZED)
+    return Rollups(apply_schema(data))
+
+
+def global_tab(tab, rollups: Rollups):
+    # Chart libraries are imported when first drawn, to keep startup fast
+    import altair as alt
+
     with tab:
         st.subheader("Global Spending Overview")
         st.write("This section provides an overview of your spending across all banks.")
 
         # Create a bar chart of spending grouped by month
-        # Aggregate spending by month using pandas PeriodIndex
-        # Create a 'Month' column for grouping
-        data["Month"] = pd.to_datetime(data["Date"]).dt.to_period("M").astype(str)
-        monthly_spending = (
-            data.groupby("Month")["Amount"]
-            .sum()
-            .reset_index()
-            .rename(columns={"Amount": "Spending"})
-            .copy()
-        )
+        monthly_spending = rollups.monthly.copy()
 
         st.subheader("Monthly Spending Bar Chart")
+        # Amounts are in cents, charts show dollars
+        dollars = to_dollars(monthly_spending["Spending"])
         chart = (
-            alt.Chart(monthly_spending)
+            alt.Chart(monthly_spending.assign(Spending=dollars))
             .mark_bar()
             .encode(
                 x=alt.X("Month", axis=alt.Axis(labelAngle=45)),
@@ -55,52 +116,152 @@ def global_tab(tab, data: pd.DataFrame):
     return tab
 
 
-def monthly_tab(data: pd.DataFrame, month: str, tab):
-    month_data = data[
-        pd.to_datetime(data["Date"]).dt.to_period("M").astype(str) == month
-    ].copy()
-    with tab:
-        cols = st.columns(2)
-        st.subheader(f"Spending Overview for {month}")
-        # Section with pie chart of spending by category for the month
-        with cols[0]:
-            fig = px.pie(
-                month_data,
-                names="Category",
-                values="Amount",
-                title=f"Spending Distribution for {month}",
-                labels={"Amount": "Spending ($)"},
+def page_start(rows: int, key: str, page_size: int = PAGE_SIZE) -> int:
+    """
+    Show a page selector when rows span several pages, and get the position
+    of the first row of the selected page.
+    """
+    pages = max(math.ceil(rows / page_size), 1)
+    page = 1
+    if pages > 1:
+        page = int(
+            st.number_input(
+                f"Page (1-{pages})",
+                min_value=1,
+                max_value=pages,
+                value=1,
+                step=1,
+                key=key,
             )
-            st.plotly_chart(fig, use_container_width=True)
-        # Section with detailed spending by category
-        with cols[1]:
-            total_spending = (
-                month_data.groupby("Category")["Amount"]
-                .sum()
-                .to_frame()
-                .reset_index()
-                .copy()
-            )
-            total_spending.loc[len(total_spending)] = [
-                "Total",
-                total_spending["Amount"].sum(),
-            ]
-            st.dataframe(
-                format_amount_col(total_spending).rename(
-                    columns={"Amount": "Spending"}
-                ),
-                hide_index=True,
-                use_container_width=True,
-            )
-        st.write("Detailed Data:")
-        monthly_data_display = format_amount_col(month_data).sort_values(
-            by="Date", ascending=False
         )
+    return (page - 1) * page_size
+
+
+def show_page(page_data: pd.DataFrame, start: int, rows: int):
+    """Display a page of transactions, formatting only its rows."""
+    st.dataframe(
+        format_amount_col(page_data.copy()),
+        hide_index=True,
+        use_container_width=True,
+        # Show dates without a time, without converting them to Python dates
+        column_config={"Date": st.column_config.DateColumn(format="YYYY-MM-DD")},
+    )
+    if rows > len(page_data):
+        st.caption(f"Rows {start + 1}-{start + len(page_data)} of {rows}")
+
+
+def paginated_dataframe(df: pd.DataFrame, key: str, page_size: int = PAGE_SIZE):
+    """Display a DataFrame one page at a time, formatting only the visible rows."""
+    start = page_start(len(df), key, page_size)
+    show_page(df.iloc[start : start + page_size], start, len(df))
+
+
+@st.fragment
+def monthly_view(rollups: Rollups):
+    """
+    Render the month picked in the selector. This runs as a fragment, so
+    changing the month or the page only reruns this view, and only the
+    selected month is computed and sent to the browser.
+    """
+    import plotly.express as px
+
+    month = st.selectbox("Month", rollups.months[::-1], key="month")
+    if month is None:
+        st.info("No data to display.")
+        return
+    month_data = rollups.month_data(month).drop(columns=["Month"])
+    category_spending = rollups.month_categories(month)
+    cols = st.columns(2)
+    st.subheader(f"Spending Overview for {month}")
+    # Section with pie chart of spending by category for the month
+    with cols[0]:
+        fig = px.pie(
+            category_spending.assign(Amount=to_dollars(category_spending["Amount"])),
+            names="Category",
+            values="Amount",
+            title=f"Spending Distribution for {month}",
+            labels={"Amount": "Spending ($)"},
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    # Section with detailed spending by category
+    with cols[1]:
+        total_spending = category_spending.reset_index(drop=True)
+        total_spending.loc[len(total_spending)] = [
+            "Total",
+            total_spending["Amount"].sum(),
+        ]
         st.dataframe(
-            monthly_data_display,
+            format_amount_col(total_spending).rename(columns={"Amount": "Spending"}),
             hide_index=True,
             use_container_width=True,
         )
+    st.write("Detailed Data:")
+    paginated_dataframe(
+        month_data.sort_values(by="Date", ascending=False), key=f"page-{month}"
+    )
+
+
+@st.fragment(run_every=float(os.environ.get("REFRESH_INTERVAL") or 5))
+def refresh_status(worker: RefreshWorker | None, version: str | None):
+    """
+    Show when the data was last refreshed, and rerun the app once a newer
+    snapshot of the global aggregate has been committed.
+    """
+    storage = get_storage()
+    if storage.version(GLOBAL_DATASET) != version:
+        st.rerun(scope="app")
+    modified = storage.modified(GLOBAL_DATASET)
+    status = (
+        f"Last refreshed: {modified:%Y-%m-%d %H:%M:%S}"
+        if modified is not None
+        else "No data yet."
+    )
+    if worker is not None and worker.refreshing.is_set():
+        status += " Refreshing in the background..."
+    st.caption(status)
+    if worker is not None and worker.last_error is not None:
+        st.warning(f"Last refresh failed: {worker.last_error}")
+
+
+def monthly_tab(rollups: Rollups, tab):
+    with tab:
+        monthly_view(rollups)
+    return tab
+
+
+@st.fragment
+def search_view(query: Query):
+    """
+    Search the descriptions of the transactions that pass the sidebar
+    filters with the search index, so each search answers from the index
+    instead of scanning the data, and only reads the page of results shown.
+    This runs as a fragment, so a new search only reruns this view.
+    """
+    text = st.text_input(
+        "Search descriptions", placeholder="e.g. whole foods, amazon", key="search"
+    )
+    if not text.strip():
+        st.info("Type a merchant or any words of a description.")
+        return
+    index = SearchIndex(GLOBAL_DATASET, get_storage())
+    with st.spinner("Searching..."):
+        totals = index.totals(text, query)
+    rows = int(totals["Count"].iloc[0])
+    cols = st.columns(2)
+    cols[0].metric("Transactions", f"{rows:,}")
+    cols[1].metric("Total", format_currency(totals["Amount"]).iloc[0])
+    if not rows:
+        st.info("No transactions found.")
+        return
+    start = page_start(rows, key=f"search-page-{text}")
+    results = index.search(text, query, limit=PAGE_SIZE, offset=start)
+    show_page(results.drop(columns=["ID"]), start, rows)
+
+
+def search_tab(query: Query, tab):
+    with tab:
+        search_view(query)
+    return tab
 
 
 def run():
@@ -123,28 +284,23 @@ def run():
         "This app helps you track and visualize your "
         "monthly spending across all your bank accounts. "
         "Use the tabs below to explore your global "
-        "spending overview and drill down into individual "
-        "months for detailed insights by category."
+        "spending overview and pick an individual "
+        "month for detailed insights by category."
     )
 
-    fetch_data()  # Ensure latest data is processed before loading
-    data = pd.read_csv(
-        Path("data") / "global_aggregate.tsv", sep="\t", parse_dates=["Date"], header=0
-    )
-    # Ensure 'Date' column only shows date (not time)
-    data["Date"] = data["Date"].dt.date
-    min_date = datetime(2025, 4, 1).date()
-    data = data[data["Date"] >= min_date]
-    data.fillna({"Category": "Uncategorized"}, inplace=True)
+    # Ingestion runs in the background, the page only reads the last snapshot
+    worker = get_refresh_worker()
+    version = get_storage().version(GLOBAL_DATASET)
+    query = sidebar_query()
+    rollups = load_rollups(version, query)
+    refresh_status(worker, version)
     # Get all months with data
-    months_with_data = (
-        pd.to_datetime(data["Date"]).dt.to_period("M").unique().astype(str)
-    )
+    months_with_data = rollups.months
     print(f"Months with data: {months_with_data}")
-    tabs = st.tabs(["Global Overview"] + months_with_data.tolist())
-    global_tab(tabs[0], data)
-    for month, tab in zip(months_with_data, tabs[1:]):
-        monthly_tab(data, month, tab)
+    tabs = st.tabs(["Global Overview", "Monthly Overview", "Search"])
+    global_tab(tabs[0], rollups)
+    monthly_tab(rollups, tabs[1])
+    search_tab(query, tabs[2])
 
 
 if __name__ == "__main__":
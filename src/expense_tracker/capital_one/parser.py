@@ -1,13 +1,9 @@
-import re
 from typing import Literal
 
-import pandas as pd
+from expense_tracker.utils.parser import SpecParser
 
-from expense_tracker.utils.logger import LOGGER
-from expense_tracker.wells_fargo.parser import WellsFargoAccountSummaryParser
 
-
-class CapitalOneAccountSummaryParser(WellsFargoAccountSummaryParser):
+class CapitalOneAccountSummaryParser(SpecParser):
     def __init__(
         self,
         csv_name: str,
@@ -16,32 +12,6 @@ class CapitalOneAccountSummaryParser(WellsFargoAccountSummaryParser):
     ):
         super().__init__(csv_name, bank, data_type)
 
-    def load_df(self):
-        """
-        Load the CSV file into a DataFrame.
-        """
-        self.df = pd.read_csv(
-            self.csv_file_path,
-            header=0,
-            parse_dates=["Date"],
-        )
-        if self.df.empty:
-            LOGGER.warning(f"No data found in {self.csv_name}.")
-        else:
-            self.df.drop(columns=["Post Date", "Memo"], inplace=True, errors="ignore")
-            self.create_id()
-            self.df["Card"] = self.df["Card"].apply(
-                lambda s: (
-                    int(s[-4:])
-                    if isinstance(s, str) and len(s) > 4 and s[-4:].isnumeric()
-                    else 0000
-                )
-            )
-            self.df.sort_values(by=["Date", "Description"], inplace=True)
-            self.card_id = self.df["Card"].iloc[0] if not self.df.empty else 0000
-            self.df["Bank"] = self.bank
-        return self.df
-
 
 if __name__ == "__main__":
     # Example usage of ChaseAccountSummaryParser
@@ -1,33 +1,251 @@
+import argparse
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from decimal import Decimal
 from pathlib import Path
-from typing import Literal, cast
+from typing import Literal
 
+from expense_tracker.query import Query
+from expense_tracker.search import SearchIndex
+from expense_tracker.utils.duplicates import DuplicateDetector, save_report
+from expense_tracker.utils.locks import coalesced
 from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils.metrics import METRICS, profiler
 from expense_tracker.utils.processing import ProcessingUtils, get_parser_class
+from expense_tracker.utils.schema import memory_report
+from expense_tracker.utils.storage import atomic_to_csv, encode_amounts, get_storage
+from expense_tracker.utils.transforms import format_currency
 
-banks = json.load(open(Path("configs") / "banks.json"))
+DATA_TYPES: list[Literal["AccountActivity", "Statements"]] = [
+    "AccountActivity",
+    "Statements",
+]
 
 
-def fetch_data():
+def load_banks() -> list[str]:
+    """
+    Read the banks to process from configs/banks.json.
+    """
+    with open(Path("configs") / "banks.json") as f:
+        return json.load(f)
+
+
+def fetch_data(workers: int | None = None):
     """
     Fetch data for each bank and process it using the appropriate parser.
+    With more than one worker (INGEST_WORKERS), the files of all banks are
+    parsed concurrently in a process pool, and each bank's aggregate is then
+    merged by this process alone.
+    Per-stage timings and counters are saved to data/.reports/ingest-report.json,
+    and the run is profiled if INGEST_PROFILE is set.
     """
-    for bank in banks:
-        LOGGER.info(f"Processing data for {bank}...")
-        cast(Literal["CapitalOne", "Chase", "WellsFargo"], bank)
-        parser = get_parser_class(
-            cast(Literal["CapitalOne", "Chase", "WellsFargo"], bank)
-        )
-        processor = ProcessingUtils(
-            bank=cast(Literal["CapitalOne", "Chase", "WellsFargo"], bank),
-            parser=parser,
-            data_type="AccountActivity",
-        )
-        processor.load_directory()
-        processor.parse_files()
-        LOGGER.info(f"Finished processing data for {bank}.")
+    workers = workers or int(os.environ.get("INGEST_WORKERS") or 1)
+    METRICS.reset()
+    with profiler():
+        parse_banks(workers)
+    METRICS.save()
     LOGGER.info("All data processing complete.")
 
 
+def parse_banks(workers: int):
+    """
+    Load the statement directories of every bank and parse their files.
+    This function is called by fetch_data.
+    Each bank is locked against concurrent ingests from the start, so its
+    manifest is read and its aggregate merged by one process at a time.
+    A bank that another ingest started after this one and finished while
+    this one waited for it is skipped, it already has the new files.
+    """
+    with ExitStack() as stack:
+        banks = load_banks()
+        # Locks are always taken in the same order, so ingests cannot deadlock
+        run = {
+            bank: stack.enter_context(coalesced(Path("data") / bank / "aggregate.lock"))
+            for bank in sorted(banks)
+        }
+        processors = []
+        for bank in banks:
+            if not run[bank]:
+                LOGGER.info(f"{bank} was ingested by a concurrent run, skipping.")
+                continue
+            LOGGER.info(f"Processing data for {bank}...")
+            for data_type in DATA_TYPES:
+                try:
+                    parser = get_parser_class(bank, data_type)
+                except ValueError:
+                    LOGGER.debug(f"No {data_type} parser for {bank}, skipping.")
+                    continue
+                processor = ProcessingUtils(
+                    bank=bank,
+                    parser=parser,
+                    data_type=data_type,
+                )
+                processor.load_directory()
+                processors.append(processor)
+        parse_processors(processors, workers)
+
+
+def parse_processors(processors: list[ProcessingUtils], workers: int):
+    """
+    Parse the files loaded by each processor, in a process pool with
+    more than one worker.
+    """
+    if workers > 1:
+        LOGGER.info(f"Parsing files with {workers} workers...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for processor in processors:
+                processor.submit_files(executor)
+            for processor in processors:
+                processor.parse_files()
+                LOGGER.info(
+                    f"Finished processing {processor.data_type} for {processor.bank}."
+                )
+    else:
+        for processor in processors:
+            processor.parse_files()
+            LOGGER.info(
+                f"Finished processing {processor.data_type} for {processor.bank}."
+            )
+
+
+def report_memory():
+    """
+    Print the memory footprint of each bank aggregate and of the global
+    aggregate, loaded with the canonical schema.
+    """
+    storage = get_storage()
+    data_path = Path("data")
+    datasets = [data_path / bank / "aggregate" for bank in load_banks()]
+    for dataset in [*datasets, data_path / "global_aggregate"]:
+        if not storage.exists(dataset):
+            continue
+        df = storage.read(dataset)
+        print(f"{storage.location(dataset)}: {len(df)} rows")
+        print(memory_report(df).to_string(), end="\n\n")
+
+
+def report_duplicates(days: int = 3, threshold: float = 0.6):
+    """
+    Report the likely duplicates and transfers of the global aggregate
+    to data/.reports/duplicates.tsv.
+    """
+    data = get_storage().read(Path("data") / "global_aggregate")
+    pairs = DuplicateDetector(days, threshold).find(data)
+    save_report(pairs)
+    if not pairs.empty:
+        print(pairs.drop(columns=["ID_a", "ID_b"]).to_string(index=False))
+
+
+def report_query(query: Query, file: Path | None = None, search: str | None = None):
+    """
+    Print the transactions of the global aggregate that pass a query,
+    or save them to a TSV file. With a search, only the transactions whose
+    description has its words are listed, found with the search index.
+    """
+    if search is not None:
+        index = SearchIndex(storage=get_storage())
+        data = index.search(search, query)
+        total = format_currency(index.totals(search, query)["Amount"]).iloc[0]
+        LOGGER.info(f"{len(data)} transactions match {search!r}, {total} in total")
+    else:
+        data = query.load()
+        LOGGER.info(f"{len(data)} transactions match {query}")
+    if file is not None:
+        atomic_to_csv(encode_amounts(data), file, sep="\t", index=False)
+        LOGGER.info(f"Transactions saved to {file}")
+    elif not data.empty:
+        data["Amount"] = format_currency(data["Amount"])
+        print(data.drop(columns=["ID"]).to_string(index=False))
+
+
+def cents(dollars: str) -> int:
+    """
+    Parse a command line amount in dollars to cents.
+    """
+    return int(Decimal(dollars) * 100)
+
+
+def cli():
+    """
+    Command line entry point: `expense-tracker ingest [--watch]`,
+    `expense-tracker memory` to report the memory footprint of the data,
+    `expense-tracker duplicates` to report likely duplicates and transfers, or
+    `expense-tracker query` to list the transactions that pass some filters
+    or match a search.
+    With --watch, ingestion runs again whenever statement files change,
+    so the dashboard can be pointed at the data without parsing anything.
+    """
+    arg_parser = argparse.ArgumentParser(prog="expense-tracker")
+    commands = arg_parser.add_subparsers(dest="command")
+    ingest = commands.add_parser("ingest", help="Parse new statement files.")
+    ingest.add_argument("--workers", type=int, help="Parser worker processes.")
+    ingest.add_argument(
+        "--watch", action="store_true", help="Keep running and ingest on changes."
+    )
+    ingest.add_argument(
+        "--interval", type=float, help="Seconds between checks for changes."
+    )
+    commands.add_parser("memory", help="Report the memory used by each dataset.")
+    duplicates = commands.add_parser(
+        "duplicates", help="Report likely duplicate transactions and transfers."
+    )
+    duplicates.add_argument(
+        "--days", type=int, default=3, help="Days apart a pair can be."
+    )
+    duplicates.add_argument(
+        "--threshold",
+        type=float,
+        default=0.6,
+        help="Minimum description similarity of duplicates, from 0 to 1.",
+    )
+    query = commands.add_parser("query", help="List transactions by filters.")
+    query.add_argument("--start", help="First date, YYYY-MM-DD.")
+    query.add_argument("--end", help="Last date, YYYY-MM-DD.")
+    query.add_argument("--bank", action="append", help="Bank, can be repeated.")
+    query.add_argument(
+        "--card", action="append", type=int, help="Card digits, can be repeated."
+    )
+    query.add_argument("--category", action="append", help="Category, can be repeated.")
+    query.add_argument("--min-amount", type=cents, help="Minimum amount in dollars.")
+    query.add_argument("--max-amount", type=cents, help="Maximum amount in dollars.")
+    query.add_argument("--description", help="Text the description contains.")
+    query.add_argument("--search", help="Words of the description, from the index.")
+    query.add_argument(
+        "--transfers",
+        action="store_true",
+        help="Include payments and transfers between accounts.",
+    )
+    query.add_argument("--output", type=Path, help="Save the results as TSV.")
+    args = arg_parser.parse_args()
+    if args.command == "memory":
+        report_memory()
+    elif args.command == "duplicates":
+        report_duplicates(args.days, args.threshold)
+    elif args.command == "query":
+        report_query(
+            Query(
+                start=args.start,
+                end=args.end,
+                banks=args.bank,
+                cards=args.card,
+                categories=args.category,
+                min_amount=args.min_amount,
+                max_amount=args.max_amount,
+                description=args.description,
+                transfers=args.transfers,
+            ),
+            args.output,
+            args.search,
+        )
+    elif args.command == "ingest" and args.watch:
+        from expense_tracker.utils.refresh import watch
+
+        watch(args.interval, args.workers)
+    else:
+        fetch_data(getattr(args, "workers", None))
+
+
 if __name__ == "__main__":
-    fetch_data()
+    cli()
@@ -0,0 +1,252 @@
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+from expense_tracker.utils.schema import TRANSFER
+from expense_tracker.utils.storage import Storage, get_storage
+
+GLOBAL_DATASET = Path("data") / "global_aggregate"
+# Category of the rows the rules and the bank left without one
+UNCATEGORIZED = "Uncategorized"
+
+
+class Query:
+    """
+    Filters over the transactions of a dataset, all optional and combined
+    with AND:
+
+    - start, end: inclusive date range.
+    - banks, cards, categories: allowed values. UNCATEGORIZED matches rows
+      without a category.
+    - min_amount, max_amount: inclusive range of the Amount, in cents.
+    - description: text the description contains, case-insensitive.
+    - transfers: whether to keep the payments and transfers between the
+      user's accounts (Type TRANSFER). They are left out by default, so
+      they are not counted as spending.
+
+    Storage backends push the filters down (Storage.select): Parquet prunes
+    bank and month partitions and row groups, SQLite filters through its
+    indexes. The filters are then applied to the rows read, so every
+    backend returns the same rows.
+    """
+
+    def __init__(
+        self,
+        start: date | str | None = None,
+        end: date | str | None = None,
+        banks: Iterable[str] | None = None,
+        cards: Iterable[int] | None = None,
+        categories: Iterable[str] | None = None,
+        min_amount: int | None = None,
+        max_amount: int | None = None,
+        description: str | None = None,
+        transfers: bool = False,
+    ):
+        self.start = pd.Timestamp(start).normalize() if start is not None else None
+        self.end = pd.Timestamp(end).normalize() if end is not None else None
+        self.banks = sorted(banks) if banks is not None else None
+        self.cards = sorted(int(card) for card in cards) if cards is not None else None
+        self.categories = sorted(categories) if categories is not None else None
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.description = description or None
+        self.transfers = transfers
+
+    def __repr__(self) -> str:
+        filters = ", ".join(
+            f"{name}={value!r}"
+            for name, value in vars(self).items()
+            if value is not None and value is not False
+        )
+        return f"Query({filters})"
+
+    @property
+    def columns(self) -> list[str]:
+        """
+        Columns the filters read.
+        """
+        filters = {
+            "Date": (self.start, self.end),
+            "Bank": (self.banks,),
+            "Card": (self.cards,),
+            "Category": (self.categories,),
+            "Amount": (self.min_amount, self.max_amount),
+            "Description": (self.description,),
+            "Type": (None if self.transfers else TRANSFER,),
+        }
+        return [
+            col
+            for col, values in filters.items()
+            if any(value is not None for value in values)
+        ]
+
+    def mask(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Flag the rows of a transactions frame that pass the filters.
+        """
+        keep = pd.Series(True, index=df.index)
+        if self.start is not None or self.end is not None:
+            dates = pd.to_datetime(df["Date"])
+            if self.start is not None:
+                keep &= dates >= self.start
+            if self.end is not None:
+                keep &= dates < self.end + pd.Timedelta(days=1)
+        if self.banks is not None:
+            keep &= df["Bank"].astype(str).isin(self.banks).to_numpy()
+        if self.cards is not None:
+            cards = pd.to_numeric(df["Card"].astype(object), errors="coerce")
+            keep &= cards.isin(self.cards).to_numpy()
+        if self.categories is not None:
+            categories = df["Category"].astype(object).fillna(UNCATEGORIZED)
+            keep &= categories.isin(self.categories).to_numpy()
+        if self.min_amount is not None:
+            keep &= (df["Amount"] >= self.min_amount).to_numpy()
+        if self.max_amount is not None:
+            keep &= (df["Amount"] <= self.max_amount).to_numpy()
+        if self.description is not None:
+            keep &= (
+                df["Description"]
+                .astype(object)
+                .str.contains(self.description, case=False, regex=False)
+                .fillna(False)
+                .astype(bool)
+                .to_numpy()
+            )
+        if not self.transfers and "Type" in df.columns:
+            keep &= (df["Type"].astype(object) != TRANSFER).to_numpy()
+        return keep
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Keep the rows of a transactions frame that pass the filters.
+        """
+        if df.empty or not self.columns:
+            return df
+        return df[self.mask(df)]
+
+    def sql(self) -> tuple[str, list]:
+        """
+        The filters as a SQL condition over the `transactions` table, with its
+        parameters. Dates are compared as ISO text, so the date index is used.
+        """
+        conditions: list[str] = []
+        params: list = []
+
+        def values(column: str, allowed: list, null: bool = False):
+            condition = f"{column} IN ({', '.join('?' * len(allowed))})"
+            if null:
+                condition = f"({condition} OR {column} IS NULL)"
+            conditions.append(condition)
+            params.extend(allowed)
+
+        if self.start is not None:
+            conditions.append("Date >= ?")
+            params.append(f"{self.start:%Y-%m-%d}")
+        if self.end is not None:
+            conditions.append("Date <= ?")
+            params.append(f"{self.end:%Y-%m-%d}")
+        if self.banks is not None:
+            values("Bank", self.banks)
+        if self.cards is not None:
+            values("Card", self.cards)
+        if self.categories is not None:
+            values("Category", self.categories, null=UNCATEGORIZED in self.categories)
+        if self.min_amount is not None:
+            conditions.append("Amount >= ?")
+            params.append(int(self.min_amount))
+        if self.max_amount is not None:
+            conditions.append("Amount <= ?")
+            params.append(int(self.max_amount))
+        if self.description is not None:
+            # LIKE is case-insensitive for ASCII, the exact match is in apply()
+            conditions.append("Description LIKE ? ESCAPE '\\'")
+            escaped = self.description
+            for char in "\\%_":
+                escaped = escaped.replace(char, "\\" + char)
+            params.append(f"%{escaped}%")
+        if not self.transfers:
+            conditions.append("(Type IS NULL OR Type != ?)")
+            params.append(TRANSFER)
+        return " AND ".join(conditions) or "1", params
+
+    def arrow(self, partitions: Iterable[str] = ()):
+        """
+        The filters as a pyarrow dataset expression, or None without filters.
+        When the dataset is partitioned by Month ("YYYY-MM"), the date range
+        also selects months, so whole partitions are skipped. Transfers are
+        only left out after the scan, datasets without them have no Type.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        conditions = []
+        if self.start is not None:
+            conditions.append(pc.field("Date") >= pa.scalar(self.start.date()))
+            if "Month" in partitions:
+                conditions.append(pc.field("Month") >= f"{self.start:%Y-%m}")
+        if self.end is not None:
+            conditions.append(pc.field("Date") <= pa.scalar(self.end.date()))
+            if "Month" in partitions:
+                conditions.append(pc.field("Month") <= f"{self.end:%Y-%m}")
+        if self.banks is not None:
+            conditions.append(pc.field("Bank").isin(self.banks))
+        if self.cards is not None:
+            conditions.append(pc.field("Card").isin(self.cards))
+        if self.categories is not None:
+            allowed = list(self.categories)
+            if UNCATEGORIZED in allowed:
+                # A null in the value set, not is_null(): the statistics of
+                # all-null row groups would skip them
+                allowed.append(None)
+            conditions.append(pc.field("Category").isin(pa.array(allowed, pa.string())))
+        # Amounts are stored as decimal dollars
+        if self.min_amount is not None:
+            conditions.append(
+                pc.field("Amount") >= pa.scalar(Decimal(self.min_amount) / 100)
+            )
+        if self.max_amount is not None:
+            conditions.append(
+                pc.field("Amount") <= pa.scalar(Decimal(self.max_amount) / 100)
+            )
+        if self.description is not None:
+            conditions.append(
+                pc.match_substring(
+                    pc.field("Description"), self.description, ignore_case=True
+                )
+            )
+        if not conditions:
+            return None
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression &= condition
+        return expression
+
+    def load(
+        self,
+        dataset: Path = GLOBAL_DATASET,
+        columns: list[str] | None = None,
+        storage: Storage | None = None,
+    ) -> pd.DataFrame:
+        """
+        Read the rows of a dataset that pass the filters, optionally only
+        the given columns, sorted by Date and Description.
+        """
+        storage = storage or get_storage()
+        return storage.select(dataset, self, columns=columns)
+
+
+def load_transactions(
+    dataset: Path = GLOBAL_DATASET,
+    columns: list[str] | None = None,
+    storage: Storage | None = None,
+    **filters,
+) -> pd.DataFrame:
+    """
+    Read the transactions of a dataset that pass the given filters, e.g.
+    `load_transactions(start="2025-07-01", banks=["Chase"])`.
+    See Query for the filters.
+    """
+    return Query(**filters).load(dataset, columns=columns, storage=storage)
@@ -0,0 +1,251 @@
+import re
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+from expense_tracker.query import GLOBAL_DATASET, UNCATEGORIZED, Query
+from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils.schema import apply_schema
+from expense_tracker.utils.storage import Storage, get_storage
+
+# Columns kept in the index, so results and totals never read the dataset
+INDEX_COLUMNS = [
+    "ID",
+    "Date",
+    "Description",
+    "Category",
+    "Amount",
+    "Card",
+    "Bank",
+    "Type",
+]
+# Columns totals can be grouped by
+GROUPS = {
+    "Month": "substr(Date, 1, 7) AS Month",
+    "Bank": "Bank",
+    "Card": "Card",
+    "Category": f"COALESCE(Category, '{UNCATEGORIZED}') AS Category",
+}
+WORDS = re.compile(r"\w+")
+
+
+class SearchIndex:
+    """
+    Full-text index of the descriptions of a dataset, in an SQLite FTS5
+    table next to it (e.g. data/global_aggregate.search.sqlite) whatever
+    the storage backend. Description tokens are normalized by the unicode61
+    tokenizer: case-folded, without diacritics and split on punctuation,
+    so "Whole Foods" finds WHOLE FOODS MARKET #12. Each word of a search
+    matches the words it starts, e.g. "amaz" finds AMAZON MKTPL.
+
+    The index is tied to the dataset's storage version. Writers add the
+    rows they write as they go (add), and an index that missed a write is
+    rebuilt from the dataset on the next search.
+    """
+
+    table = "transactions"
+
+    def __init__(self, dataset: Path = GLOBAL_DATASET, storage: Storage | None = None):
+        self.dataset = dataset
+        self.storage = storage or get_storage()
+        self.index_file = dataset.with_suffix(".search.sqlite")
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open the index, creating its tables if needed.
+        """
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.index_file, timeout=30, isolation_level=None)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")]
+        if columns and not set(INDEX_COLUMNS) <= set(columns):
+            # Indexes made before a column was indexed are rebuilt
+            conn.execute(f"DROP TABLE {self.table}")
+            conn.execute("DROP TABLE IF EXISTS words")
+            conn.execute("DELETE FROM meta")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} (rowid INTEGER PRIMARY KEY, "
+            "ID TEXT UNIQUE, Date TEXT, Description TEXT, Category TEXT, "
+            "Amount INTEGER, Card, Bank TEXT, Type TEXT)"
+        )
+        # The words only map to rowids of the transactions table
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS words USING fts5("
+            "Description, content='', prefix='2 3')"
+        )
+        return conn
+
+    @staticmethod
+    def indexed_version(conn: sqlite3.Connection) -> str | None:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row is not None else None
+
+    def insert(self, conn: sqlite3.Connection, rows: pd.DataFrame):
+        """
+        Upsert rows into the transactions table, matched on ID, and index the
+        words of the new ones. The words of an ID never change, its
+        normalized description is part of it.
+        """
+        if rows.empty:
+            return
+        df = rows.reindex(columns=INDEX_COLUMNS)
+        df["Date"] = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m-%d")
+        df = df.astype(object).where(df.notna(), None)
+        last = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {self.table}")
+        last = last.fetchone()[0]
+        updates = ", ".join(f"{col} = excluded.{col}" for col in INDEX_COLUMNS[1:])
+        conn.executemany(
+            f"INSERT INTO {self.table} ({', '.join(INDEX_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(INDEX_COLUMNS))}) "
+            f"ON CONFLICT(ID) DO UPDATE SET {updates}",
+            df.itertuples(index=False, name=None),
+        )
+        conn.execute(
+            "INSERT INTO words (rowid, Description) "
+            f"SELECT rowid, COALESCE(Description, '') FROM {self.table} "
+            "WHERE rowid > ?",
+            (last,),
+        )
+
+    def add(self, rows: pd.DataFrame, base: str | None):
+        """
+        Index rows just written to the dataset, whose version was base
+        before the write. An index that is not at that version missed a
+        write and is left to be rebuilt by the next search.
+        """
+        version = self.storage.version(self.dataset)
+        with closing(self.connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.indexed_version(conn) == base:
+                    self.insert(conn, rows)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,)
+                    )
+                    LOGGER.debug(f"Indexed {len(rows)} rows in {self.index_file}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def sync(self):
+        """
+        Rebuild the index from the dataset if it is not at its version.
+        """
+        with closing(self.connect()) as conn:
+            if self.indexed_version(conn) == self.storage.version(self.dataset):
+                return
+        # Writers hold the dataset's lock while they add rows
+        with self.storage.lock(self.dataset), closing(self.connect()) as conn:
+            version = self.storage.version(self.dataset)
+            if self.indexed_version(conn) == version:
+                return
+            LOGGER.info(f"Rebuilding the search index {self.index_file}")
+            data = self.storage.read(self.dataset, columns=INDEX_COLUMNS)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(f"DELETE FROM {self.table}")
+                # Contentless FTS5 tables are only emptied by this command
+                conn.execute("INSERT INTO words (words) VALUES ('delete-all')")
+                self.insert(conn, data)
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def match(text: str) -> str | None:
+        """
+        The FTS5 query of a search: every word, as a prefix.
+        None if the search has no words.
+        """
+        words = WORDS.findall(text)
+        if not words:
+            return None
+        return " AND ".join(f'"{word}"*' for word in words)
+
+    def where(self, text: str, query: Query | None) -> tuple[str, list]:
+        where, params = (query or Query()).sql()
+        return (
+            "rowid IN (SELECT rowid FROM words WHERE words MATCH ?) AND " + where,
+            [self.match(text), *params],
+        )
+
+    def search(
+        self,
+        text: str,
+        query: Query | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> pd.DataFrame:
+        """
+        Get the transactions whose description has the words of a search,
+        newest first, optionally only those that pass a query's filters.
+        With a limit, only that many rows from offset on are read, e.g. a
+        page of results.
+        """
+        columns = [col for col in INDEX_COLUMNS if col != "ID"] + ["ID"]
+        if self.match(text) is None:
+            return pd.DataFrame(columns=columns)
+        self.sync()
+        where, params = self.where(text, query)
+        with closing(self.connect()) as conn:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(columns)} FROM {self.table} WHERE {where} "
+                "ORDER BY Date DESC, Description"
+                + (f" LIMIT {int(limit)} OFFSET {int(offset)}" if limit else ""),
+                conn,
+                params=params,
+            )
+        return apply_schema(df)
+
+    def totals(
+        self, text: str, query: Query | None = None, by: list[str] | None = None
+    ) -> pd.DataFrame:
+        """
+        Count and sum the amounts of the transactions a search finds,
+        optionally grouped by Month, Bank, Card or Category. Without groups,
+        there is always a single row, e.g. 0 and 0 for a search without words.
+        """
+        by = by or []
+        unknown = set(by) - set(GROUPS)
+        if unknown:
+            raise ValueError(f"Cannot group search totals by {sorted(unknown)}")
+        if self.match(text) is None:
+            count = [] if by else [0]
+            return pd.DataFrame(
+                {
+                    **{col: [] for col in by},
+                    "Count": pd.Series(count, dtype="int64"),
+                    "Amount": pd.Series(count, dtype="int64"),
+                }
+            )
+        self.sync()
+        where, params = self.where(text, query)
+        keys = ", ".join(str(i) for i in range(1, len(by) + 1))
+        with closing(self.connect()) as conn:
+            df = pd.read_sql_query(
+                f"SELECT {''.join(GROUPS[col] + ', ' for col in by)}"
+                f"COUNT(*) AS Count, COALESCE(SUM(Amount), 0) AS Amount "
+                f"FROM {self.table} WHERE {where}"
+                + (f" GROUP BY {keys} ORDER BY {keys}" if by else ""),
+                conn,
+                params=params,
+            )
+        return df
+
+
+def search_transactions(
+    text: str, limit: int | None = None, storage: Storage | None = None, **filters
+) -> pd.DataFrame:
+    """
+    Get the transactions of the global aggregate whose description has the
+    words of a search, e.g. `search_transactions("whole foods", banks=["Chase"])`.
+    See Query for the filters.
+    """
+    return SearchIndex(storage=storage).search(text, Query(**filters), limit=limit)
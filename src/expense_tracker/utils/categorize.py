@@ -0,0 +1,93 @@
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils.text_ops import normalize_description
+
+rules_file = Path("configs") / "categories.json"
+
+
+class Categorizer:
+    """
+    Rule-based transaction categorizer.
+    Rules map a category to a list of merchant patterns. Plain patterns are
+    case-insensitive substrings, patterns prefixed with "re:" are regexes.
+    All rules are compiled into a single alternation with one named group per
+    rule, so each description is scanned once; the leftmost match wins and
+    ties go to the rule listed first. Results are memoized per distinct
+    normalized description.
+    """
+
+    def __init__(self, rules: dict[str, list[str]]):
+        self.rules = rules
+        self.group_categories: list[str] = []
+        alternatives = []
+        for category, patterns in rules.items():
+            for pattern in patterns:
+                if pattern.startswith("re:"):
+                    regex = pattern[3:]
+                    re.compile(regex)  # Fail early on invalid rules
+                else:
+                    regex = re.escape(" ".join(pattern.upper().split()))
+                alternatives.append(f"(?P<g{len(self.group_categories)}>{regex})")
+                self.group_categories.append(category)
+        self.pattern = (
+            re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        )
+        self.cache: dict[str, str | None] = {}
+
+    @classmethod
+    def from_file(cls, file: Path = rules_file) -> "Categorizer":
+        """
+        Load the categorization rules from a JSON file.
+        """
+        with open(file) as f:
+            return cls(json.load(f))
+
+    def classify_unique(self, descriptions: list[str]) -> np.ndarray:
+        """
+        Classify normalized descriptions that are not in the cache yet.
+        """
+        if self.pattern is None:
+            return np.full(len(descriptions), None, dtype=object)
+        groups = [f"g{i}" for i in range(len(self.group_categories))]
+        matches = pd.Series(descriptions, dtype=object).str.extract(self.pattern)
+        matched = matches[groups].notna().to_numpy()
+        categories = np.array(self.group_categories, dtype=object)
+        return np.where(matched.any(axis=1), categories[matched.argmax(axis=1)], None)
+
+    def classify(self, descriptions: pd.Series) -> pd.Series:
+        """
+        Get the category of each description, or None if no rule matches.
+        """
+        codes, uniques = pd.factorize(normalize_description(descriptions))
+        unknown = [u for u in uniques if u not in self.cache]
+        if unknown:
+            self.cache.update(zip(unknown, self.classify_unique(unknown)))
+        categories = np.array([self.cache[u] for u in uniques] + [None], dtype=object)
+        # Missing descriptions have code -1, which maps to the trailing None
+        return pd.Series(categories[codes], index=descriptions.index, dtype=object)
+
+
+_categorizer: Categorizer | None = None
+_rules_mtime: float | None = None
+
+
+def get_categorizer(file: Path = rules_file) -> Categorizer | None:
+    """
+    Get the categorizer for the rules file, reloading it when the file changes.
+    Returns None if there is no rules file.
+    """
+    global _categorizer, _rules_mtime
+    if not file.exists():
+        return None
+    mtime = file.stat().st_mtime
+    if _categorizer is None or mtime != _rules_mtime:
+        _categorizer = Categorizer.from_file(file)
+        _rules_mtime = mtime
+        LOGGER.debug(f"Loaded {len(_categorizer.group_categories)} rules from {file}")
+    return _categorizer
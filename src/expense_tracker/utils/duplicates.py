@@ -0,0 +1,164 @@
+import re
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils import metrics
+from expense_tracker.utils.storage import atomic_to_csv, encode_amounts
+from expense_tracker.utils.text_ops import normalize_description
+
+SIDE_COLUMNS = ["ID", "Date", "Bank", "Card", "Description"]
+# Punctuation differs between exports
+NOISE = re.compile(r"[^A-Z0-9 ]+")
+NUMBERS = re.compile(r"\d+")
+
+
+class DuplicateDetector:
+    """
+    Find transactions of the global dataset that are likely the same money
+    movement seen twice, e.g. in overlapping exports of one card, or in both
+    a statement and an account export with differently formatted descriptions:
+
+    - duplicate: same amount on the same account within `days` days, with
+      descriptions at least `threshold` similar. Card 0 (unknown) matches
+      any card of the bank. Rows identical in card, date and description
+      are left out, they are repeated purchases told apart by their IDs.
+    - transfer: opposite amounts within `days` days on different accounts,
+      e.g. a checking withdrawal and the card payment it funded. Both sides
+      are usually flagged as transfers at ingest (Type TRANSFER).
+
+    Candidates are blocked by amount and date: rows are sorted by absolute
+    amount and date once, and each row is only compared with the next rows
+    of its block, so the work grows with the number of rows times the block
+    size instead of quadratically. Descriptions are only compared within
+    blocks, once per distinct pair. Nothing is dropped, the pairs are
+    reported for review.
+    """
+
+    def __init__(self, days: int = 3, threshold: float = 0.6):
+        self.days = days
+        self.threshold = threshold
+        self.cache: dict[tuple[str, str], float] = {}
+
+    def candidates(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the positions of the pairs of rows with the same absolute amount,
+        at most `days` days apart. Zero amounts are skipped.
+        """
+        cents = np.abs(df["Amount"].to_numpy(dtype=np.int64))
+        dates = (
+            pd.to_datetime(df["Date"]).to_numpy().astype("datetime64[D]").astype(int)
+        )
+        rows = np.flatnonzero(cents != 0)
+        order = rows[np.lexsort((dates[rows], cents[rows]))]
+        cents, dates = cents[order], dates[order]
+        lefts, rights = [], []
+        # Pairs k rows apart in the sorted order. If no row has a partner k
+        # rows ahead in its block, none has one further ahead either.
+        for k in range(1, len(order)):
+            paired = (cents[k:] == cents[:-k]) & (dates[k:] - dates[:-k] <= self.days)
+            if not paired.any():
+                break
+            i = np.flatnonzero(paired)
+            lefts.append(order[i])
+            rights.append(order[i + k])
+        if not lefts:
+            return np.array([], dtype=int), np.array([], dtype=int)
+        return np.concatenate(lefts), np.concatenate(rights)
+
+    def similarity(self, a: str, b: str) -> float:
+        """
+        Similarity ratio of two normalized descriptions, ignoring
+        punctuation. Descriptions that both have numbers but none in common,
+        e.g. the store numbers of KROGER #106 and KROGER #3443, are told
+        apart whatever their text.
+        """
+        key = (a, b) if a <= b else (b, a)
+        if key not in self.cache:
+            numbers = [set(NUMBERS.findall(text)) for text in key]
+            if all(numbers) and not numbers[0] & numbers[1]:
+                self.cache[key] = 0.0
+            else:
+                self.cache[key] = SequenceMatcher(
+                    None,
+                    NOISE.sub(" ", key[0]).strip(),
+                    NOISE.sub(" ", key[1]).strip(),
+                ).ratio()
+        return self.cache[key]
+
+    def find(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Find the duplicate and transfer pairs of a transactions frame.
+        Returns one row per pair: Kind, Similarity, Days apart, Amount of
+        the first row, and the ID, Date, Bank, Card and Description of both.
+        """
+        columns = ["Kind", "Similarity", "Days", "Amount"] + [
+            f"{col}_{side}" for side in "ab" for col in SIDE_COLUMNS
+        ]
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+        df = df.reset_index(drop=True)
+        left, right = self.candidates(df)
+        a = df.iloc[left].reset_index(drop=True)
+        b = df.iloc[right].reset_index(drop=True)
+        descriptions_a = normalize_description(a["Description"])
+        descriptions_b = normalize_description(b["Description"])
+        cards_a = a["Card"].astype(int).to_numpy()
+        cards_b = b["Card"].astype(int).to_numpy()
+        same_bank = a["Bank"].astype(str).to_numpy() == b["Bank"].astype(str).to_numpy()
+        same_account = same_bank & (cards_a == cards_b)
+        same_sign = np.sign(a["Amount"].to_numpy()) == np.sign(b["Amount"].to_numpy())
+        repeated = (
+            same_account
+            & (a["Date"].to_numpy() == b["Date"].to_numpy())
+            & (descriptions_a == descriptions_b).to_numpy()
+        )
+        similarity = np.array(
+            [
+                self.similarity(x, y)
+                for x, y in zip(descriptions_a, descriptions_b, strict=True)
+            ],
+            dtype=float,
+        )
+        duplicate = (
+            same_sign
+            & same_bank
+            & ((cards_a == cards_b) | (cards_a == 0) | (cards_b == 0))
+            & ~repeated
+            & (similarity >= self.threshold)
+        )
+        transfer = ~same_sign & ~same_account
+        kind = np.select([duplicate, transfer], ["duplicate", "transfer"], "")
+        keep = kind != ""
+        a, b = a[keep], b[keep]
+        pairs = pd.DataFrame(
+            {
+                "Kind": kind[keep],
+                "Similarity": similarity[keep].round(2),
+                "Days": (
+                    (pd.to_datetime(b["Date"]) - pd.to_datetime(a["Date"])).dt.days
+                ).to_numpy(),
+                "Amount": a["Amount"].to_numpy(),
+            }
+        )
+        for side, rows in (("a", a), ("b", b)):
+            for col in SIDE_COLUMNS:
+                pairs[f"{col}_{side}"] = rows[col].to_numpy()
+        return pairs.sort_values(by=["Kind", "Date_a", "Amount"], ignore_index=True)
+
+
+def save_report(pairs: pd.DataFrame, file: Path | None = None) -> Path:
+    """
+    Write the pairs found by a DuplicateDetector as a TSV report.
+    """
+    file = file or metrics.reports_path / "duplicates.tsv"
+    atomic_to_csv(encode_amounts(pairs), file, sep="\t", index=False)
+    counts = pairs["Kind"].value_counts()
+    LOGGER.info(
+        f"Found {counts.get('duplicate', 0)} likely duplicates and "
+        f"{counts.get('transfer', 0)} transfers, report saved to {file}"
+    )
+    return file
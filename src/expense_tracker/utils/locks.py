@@ -0,0 +1,80 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from expense_tracker.utils.logger import LOGGER
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Locks held by the current thread: lock file -> [file descriptor, depth]
+_held = threading.local()
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False) -> Iterator[int]:
+    """
+    Hold an advisory lock (fcntl.flock) on a lock file, so processes sharing
+    data/ take turns: exclusive for writers, shared for readers.
+    Yields the lock file's descriptor, which the holder may use to keep
+    state in the file. Locks are reentrant within a thread, a nested
+    acquisition of a lock the thread already holds returns at once (a
+    shared lock cannot be upgraded this way). Without fcntl (Windows)
+    nothing is locked.
+    """
+    held: dict[str, list[int]] = _held.__dict__.setdefault("locks", {})
+    key = os.path.abspath(path)
+    if key in held:
+        held[key][1] += 1
+        try:
+            yield held[key][0]
+        finally:
+            held[key][1] -= 1
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+            try:
+                fcntl.flock(fd, mode | fcntl.LOCK_NB)
+            except BlockingIOError:
+                LOGGER.debug(f"Waiting for {path.name}...")
+                fcntl.flock(fd, mode)
+        held[key] = [fd, 1]
+        try:
+            yield fd
+        finally:
+            del held[key]
+    finally:
+        # Closing the file releases the lock
+        os.close(fd)
+
+
+@contextmanager
+def coalesced(path: Path) -> Iterator[bool]:
+    """
+    Serialize a job across processes with an exclusive lock on a lock file,
+    and coalesce concurrent requests for it: yields False when a run that
+    started after this request was made has completed in the meantime,
+    since it already did the work, and True when the job should run.
+    The start time of the last completed run is kept in the lock file.
+    """
+    requested = time.time()
+    with file_lock(path) as fd:
+        try:
+            last = float(os.pread(fd, 64, 0).decode().strip() or 0)
+        except ValueError:
+            last = 0.0
+        if last >= requested:
+            yield False
+            return
+        started = time.time()
+        yield True
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, f"{started}\n".encode(), 0)
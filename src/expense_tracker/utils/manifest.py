@@ -0,0 +1,86 @@
+import hashlib
+import json
+from pathlib import Path
+
+from expense_tracker.utils.logger import LOGGER
+
+
+def file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 hash of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """
+    Persistent record of the statement files that have already been ingested.
+    Each entry stores the file's path, size, mtime and content hash so that
+    unchanged files can be skipped without being reparsed.
+    """
+
+    def __init__(self, manifest_file: Path):
+        self.manifest_file = manifest_file
+        self.entries: dict[str, dict] = {}
+        if self.manifest_file.exists():
+            try:
+                with open(self.manifest_file) as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                LOGGER.warning(
+                    f"Could not read manifest {self.manifest_file}, starting fresh."
+                )
+                self.entries = {}
+
+    def is_current(self, file: Path) -> bool:
+        """
+        Check whether a file has already been ingested and is unchanged.
+        Size and mtime are checked first; the content hash is only computed
+        when they differ (e.g. the file was touched or copied again).
+        """
+        entry = self.entries.get(file.name)
+        if entry is None:
+            return False
+        stat = file.stat()
+        if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return True
+        if entry["size"] != stat.st_size:
+            return False
+        if entry["sha256"] == file_hash(file):
+            # Same content, refresh the stat fields to keep the fast path.
+            entry["mtime"] = stat.st_mtime
+            return True
+        return False
+
+    def record(self, file: Path):
+        """
+        Record a file as ingested.
+        """
+        stat = file.stat()
+        self.entries[file.name] = {
+            "path": str(file),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": file_hash(file),
+        }
+
+    def clear(self):
+        """
+        Forget all ingested files, forcing a full reparse.
+        """
+        self.entries = {}
+
+    def save(self):
+        """
+        Save the manifest to disk.
+        """
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(self.entries, f, indent=2)
+        tmp_file.replace(self.manifest_file)
+        LOGGER.debug(f"Manifest saved to {self.manifest_file}")
@@ -0,0 +1,162 @@
+import cProfile
+import json
+import os
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils.storage import file_mode
+
+reports_path = Path.cwd() / "data" / ".reports"
+
+
+class Metrics:
+    """
+    Per-stage timings and counters of an ingestion run.
+    Stages are named "<bank>/<data_type>/<stage>", e.g.
+    "Chase/AccountActivity/read", and each holds the seconds spent in it,
+    the number of calls and any counters (rows_in, rows_out, bytes_read,
+    bytes_written, dedup_hits, ...).
+    """
+
+    def __init__(self):
+        self.stages: defaultdict[str, defaultdict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self.started = datetime.now()
+
+    @contextmanager
+    def timer(self, stage: str):
+        """
+        Time a stage. Yields the stage's counters so they can be updated.
+        """
+        start = time.perf_counter()
+        try:
+            yield self.stages[stage]
+        finally:
+            self.stages[stage]["seconds"] += time.perf_counter() - start
+            self.stages[stage]["calls"] += 1
+
+    def add(self, stage: str, **counters: float):
+        """
+        Add to the counters of a stage.
+        """
+        for name, value in counters.items():
+            self.stages[stage][name] += value
+
+    @contextmanager
+    def capture(self):
+        """
+        Record the stages of a block separately and yield them, so metrics
+        from a worker process can be sent back and merged into the parent's.
+        """
+        stages, self.stages = self.stages, defaultdict(lambda: defaultdict(float))
+        captured = self.stages
+        try:
+            yield captured
+        finally:
+            self.stages = stages
+
+    def merge(self, stages: dict[str, dict[str, float]]):
+        """
+        Merge stages recorded elsewhere, e.g. by capture() in a worker.
+        """
+        for stage, counters in stages.items():
+            self.add(stage, **counters)
+
+    def reset(self):
+        self.stages.clear()
+        self.started = datetime.now()
+
+    def report(self) -> dict:
+        """
+        Build the run report: every stage, and totals per stage kind.
+        """
+        totals: defaultdict[str, defaultdict[str, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        for stage, counters in self.stages.items():
+            for name, value in counters.items():
+                totals[stage.rsplit("/", 1)[-1]][name] += value
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "seconds": (datetime.now() - self.started).total_seconds(),
+            "stages": {stage: dict(c) for stage, c in sorted(self.stages.items())},
+            "totals": {stage: dict(c) for stage, c in sorted(totals.items())},
+        }
+
+    def save(self, file: Path | None = None) -> Path:
+        """
+        Write the run report as JSON.
+        """
+        file = file or reports_path / "ingest-report.json"
+        file.parent.mkdir(parents=True, exist_ok=True)
+        # A temporary file of its own, as concurrent runs save the same report
+        fd, tmp_name = tempfile.mkstemp(
+            dir=file.parent, prefix=f".{file.name}.", suffix=".tmp"
+        )
+        os.fchmod(fd, file_mode(file))
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(tmp_name, file)
+        LOGGER.info(f"Ingestion report saved to {file}")
+        return file
+
+
+METRICS = Metrics()
+
+
+def file_size(path: Path) -> int:
+    """
+    Get the size of a file, or of all files under a directory.
+    """
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+
+@contextmanager
+def profiler(output_dir: Path | None = None):
+    """
+    Profile a block if INGEST_PROFILE is set to "cprofile" or "pyinstrument".
+    cProfile stats are saved to ingest.prof (open with pstats or snakeviz),
+    pyinstrument output to ingest-profile.html, both in data/.reports.
+    """
+    mode = (os.environ.get("INGEST_PROFILE") or "").lower()
+    output_dir = output_dir or reports_path
+    if not mode:
+        yield
+        return
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if mode == "cprofile":
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(output_dir / "ingest.prof")
+            LOGGER.info(f"cProfile stats saved to {output_dir / 'ingest.prof'}")
+    elif mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise ImportError(
+                "INGEST_PROFILE=pyinstrument requires pyinstrument. "
+                "Install it with `pip install pyinstrument`."
+            ) from e
+        profile = Profiler()
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            output = output_dir / "ingest-profile.html"
+            output.write_text(profile.output_html())
+            LOGGER.info(f"pyinstrument profile saved to {output}")
+    else:
+        raise ValueError(f"Unsupported INGEST_PROFILE: {mode}")
@@ -1,31 +1,462 @@
+import itertools
+import tempfile
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Literal
+from typing import Iterator, Literal
 
 import pandas as pd
 
+from expense_tracker.search import SearchIndex
+from expense_tracker.utils.categorize import get_categorizer
 from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils.metrics import METRICS, file_size
+from expense_tracker.utils.schema import apply_schema
+from expense_tracker.utils.sources import AggregateSources
+from expense_tracker.utils.specs import get_spec
+from expense_tracker.utils.storage import encode_amounts, get_storage
+from expense_tracker.utils.streaming import (
+    MIN_BLOCK_ROWS,
+    align_chunks,
+    drop_duplicate_ids,
+    merge_sorted,
+    read_run,
+    sort_chunk,
+    write_runs,
+)
+from expense_tracker.utils.text_ops import transaction_ids, upgrade_legacy_ids
+from expense_tracker.utils.watermark import Watermarks
 
 data_path = Path.cwd() / "data"
 
 
-class PDFParser(ABC):
+class AggregateParser(ABC):
+    """
+    Shared storage logic of the PDF and CSV parsers: loading, merging and
+    writing the bank and global aggregates.
+    """
+
     def __init__(
         self,
-        pdf_name: str,
-        bank: Literal[
-            "WellsFargo", "Chase", "CapitalOne", "Ally", "Deserve", "Syncrony"
-        ] = "WellsFargo",
+        bank: str = "WellsFargo",
+        data_type: Literal[
+            "YearEnd", "Statements", "AccountActivity"
+        ] = "AccountActivity",
+        *args,
+        **kwargs,
     ):
         self.df = pd.DataFrame()
+        self.bank = bank
+        self.data_type = data_type
+        self.data_path = data_path
+        self.add_new_only: bool = kwargs.get("add_new_only", True)
+        self.storage = get_storage(kwargs.get("storage"))
+        self.aggregate_dataset = data_path / self.bank / "aggregate"
+        self.global_aggregate_dataset = data_path / "global_aggregate"
+        self.aggregate_file = self.storage.location(self.aggregate_dataset)
+        self.global_aggregate_file = self.storage.location(
+            self.global_aggregate_dataset
+        )
+        # Rows the last merge added to the bank aggregate, and the version
+        # of the aggregate they were added to
+        self.delta: pd.DataFrame | None = None
+        self.delta_base: str | None = None
+
+    @abstractmethod
+    def load_df(self) -> pd.DataFrame:
+        pass
+
+    def stage(self, name: str) -> str:
+        """
+        Name of an ingestion stage of this parser in the run metrics.
+        """
+        return f"{self.bank}/{self.data_type}/{name}"
+
+    @abstractmethod
+    def save_to_aggregate(self):
+        """
+        Save the parsed DataFrame to the aggregate file.
+        If the file does not exist, it will be created.
+        """
+        pass
+
+    def categorize(self) -> pd.DataFrame:
+        """
+        Assign a Category to each transaction from the rules file
+        (configs/categories.json). Rule matches take precedence, otherwise the
+        category provided by the bank export (if any) is kept.
+        """
+        categorizer = get_categorizer()
+        if categorizer is None or self.df.empty:
+            return self.df
+        categories = categorizer.classify(self.df["Description"])
+        if "Category" in self.df.columns:
+            categories = categories.fillna(self.df["Category"])
+        self.df["Category"] = categories
+        return self.df
+
+    def load_aggregate(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Load the bank aggregate, or an empty DataFrame if it does not exist.
+        """
+        return self.storage.read(self.aggregate_dataset, columns=columns)
+
+    def write_aggregate(self, df: pd.DataFrame):
+        """
+        Atomically write the bank aggregate.
+        """
+        self.storage.write(self.aggregate_dataset, df)
+        LOGGER.info(f"Data saved to {self.aggregate_file}")
+
+    def load_global_aggregate(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Load the global aggregate, or an empty DataFrame if it does not exist.
+        """
+        return self.storage.read(self.global_aggregate_dataset, columns=columns)
+
+    def write_global_aggregate(self, df: pd.DataFrame):
+        """
+        Atomically write the global aggregate.
+        """
+        self.storage.write(self.global_aggregate_dataset, df)
+        LOGGER.info(f"Data saved to {self.global_aggregate_file}")
+
+    def filter_new_rows(self, watermarks: Watermarks) -> pd.DataFrame:
+        """
+        Filter the parsed DataFrame against the aggregate's watermarks before
+        merging: if add_new_only is True, rows the watermarks already know are
+        dropped. Older rows are kept, the merge deduplicates them on ID.
+        Subclasses can override this to drop other unwanted rows.
+        """
+        if self.add_new_only and not self.df.empty:
+            self.df = self.df[~watermarks.seen(self.df)]
+        return self.df
+
+    def append_to_aggregate(self, data: pd.DataFrame, watermarks: Watermarks) -> bool:
+        """
+        Append sorted new rows to the end of the bank aggregate in place, if
+        the storage backend supports it and they all sort after its last row.
+        Returns False if the aggregate has to be rewritten instead.
+        """
+        if not (
+            self.storage.appendable
+            and watermarks.sorts_after(data)
+            and not watermarks.seen(data).any()
+        ):
+            return False
+        try:
+            self.storage.append(self.aggregate_dataset, data)
+        except ValueError as e:
+            LOGGER.debug(f"Cannot append to {self.aggregate_file}: {e}")
+            return False
+        LOGGER.info(f"Appended {len(data)} rows to {self.aggregate_file}")
+        return True
+
+    @staticmethod
+    def merge_frames(
+        existing: pd.DataFrame, frames: list[pd.DataFrame]
+    ) -> pd.DataFrame:
+        """
+        Combine the existing aggregate with new frames in a single
+        concat, dedup on the transaction ID and sort.
+        """
+        frames = [df for df in [upgrade_legacy_ids(existing), *frames] if not df.empty]
+        if not frames:
+            return pd.DataFrame()
+        data = pd.concat(frames, ignore_index=True)
+        data.drop_duplicates(subset=["ID"], inplace=True)
+        data.sort_values(by=["Date", "Description"], inplace=True)
+        return data
+
+    @classmethod
+    def save_batch_to_aggregate(cls, parsers: list["AggregateParser"]):
+        """
+        Merge the data of several parsed files of the same bank into the
+        aggregate file. New rows are filtered with the aggregate's watermarks,
+        and appended in place when they all sort after its last row (e.g. a new
+        month of data). Otherwise the aggregate is read once, all new rows are
+        combined with it in a single sort/dedup and the result is written once.
+        With an incremental storage backend, the new rows are instead upserted
+        into both the bank and the global aggregate, without rewriting either.
+        The rows added are kept as the first parser's delta, for
+        save_to_global_aggregate.
+        """
+        parsers = [p for p in parsers if hasattr(p, "df") and not p.df.empty]
+        if not parsers:
+            LOGGER.warning("No data to save.")
+            return
+        first_parser = parsers[0]
+        storage = first_parser.storage
+        with storage.lock(first_parser.aggregate_dataset):
+            with METRICS.timer(first_parser.stage("filter")) as counters:
+                watermarks = Watermarks.load(storage, first_parser.aggregate_dataset)
+                counters["rows_in"] += sum(len(p.df) for p in parsers)
+                frames = [p.filter_new_rows(watermarks) for p in parsers]
+                frames = [df for df in frames if not df.empty]
+                counters["rows_out"] += sum(len(df) for df in frames)
+            if not frames:
+                LOGGER.info(f"No new rows for {first_parser.aggregate_file}")
+                return
+            with METRICS.timer(first_parser.stage("save_to_aggregate")) as counters:
+                data = pd.concat(frames, ignore_index=True)
+                counters["rows_in"] += len(data)
+                if storage.incremental:
+                    data.drop_duplicates(subset=["ID"], keep="last", inplace=True)
+                    counters["dedup_hits"] += counters["rows_in"] - len(data)
+                    first_parser.upsert_to_aggregates(data)
+                    counters["upserts"] += 1
+                else:
+                    data.drop_duplicates(subset=["ID"], inplace=True)
+                    counters["dedup_hits"] += counters["rows_in"] - len(data)
+                    data.sort_values(by=["Date", "Description"], inplace=True)
+                    first_parser.delta_base = storage.version(
+                        first_parser.aggregate_dataset
+                    )
+                    if first_parser.append_to_aggregate(data, watermarks):
+                        counters["appends"] += 1
+                    else:
+                        existing = first_parser.load_aggregate()
+                        merged = cls.merge_frames(existing, [data])
+                        counters["dedup_hits"] += (
+                            len(existing) + len(data) - len(merged)
+                        )
+                        first_parser.write_aggregate(merged)
+                        counters["rewrites"] += 1
+                        if not existing.empty:
+                            data = data[~data["ID"].isin(existing["ID"])]
+                    first_parser.delta = data
+                counters["rows_out"] += len(data)
+                counters["bytes_written"] += file_size(first_parser.aggregate_file)
+                watermarks.update(data)
+                watermarks.save(storage.version(first_parser.aggregate_dataset))
+
+    def upsert_to_aggregates(self, data: pd.DataFrame):
+        """
+        Upsert new rows into the bank and the global aggregate, and the
+        global search index, for incremental storage backends.
+        """
+        delta_base = self.storage.version(self.aggregate_dataset)
+        self.storage.upsert(self.aggregate_dataset, data)
+        LOGGER.info(f"Upserted {len(data)} rows into {self.aggregate_file}")
+        self.upsert_to_global_aggregate(data, delta_base)
+
+    def upsert_to_global_aggregate(self, data: pd.DataFrame, delta_base: str | None):
+        """
+        Upsert the rows added to the bank aggregate at version delta_base into
+        the global aggregate and the search index, for incremental storage
+        backends. If the global aggregate does not hold the bank aggregate as
+        it was at that version (see AggregateSources), e.g. it was deleted,
+        the whole bank aggregate is upserted instead.
+        """
+        with self.storage.lock(self.global_aggregate_dataset):
+            sources = AggregateSources.load(self.storage, self.global_aggregate_dataset)
+            if not sources.holds(self.bank, delta_base):
+                LOGGER.info(
+                    f"Backfilling {self.global_aggregate_file} from {self.bank}"
+                )
+                data = self.load_aggregate()
+            if data.empty:
+                return
+            base = self.storage.version(self.global_aggregate_dataset)
+            self.storage.upsert(self.global_aggregate_dataset, data)
+            sources.banks[self.bank] = self.storage.version(self.aggregate_dataset)
+            sources.save(self.storage.version(self.global_aggregate_dataset))
+            SearchIndex(self.global_aggregate_dataset, self.storage).add(data, base)
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Parse the source file in normalized chunks of about chunksize rows.
+        Parsers that cannot stream their input yield the whole file at once.
+        """
+        df = self.load_df()
+        if not df.empty:
+            yield df
+
+    @classmethod
+    def stream_batch_to_aggregate(
+        cls, parsers: list["AggregateParser"], chunksize: int
+    ):
+        """
+        Merge the source files of several parsers of the same bank into the
+        aggregate one chunk at a time, so memory stays bounded by the chunk
+        size instead of the file sizes.
+        Incremental storage backends upsert each chunk as it is parsed.
+        Otherwise each chunk is sorted and spilled to a temporary run file,
+        and the runs are merged with the existing aggregate in an external
+        merge sort that is written out block by block.
+        """
+        if not parsers:
+            return
+        first_parser = parsers[0]
+        storage = first_parser.storage
+        with storage.lock(first_parser.aggregate_dataset):
+            watermarks = Watermarks.load(storage, first_parser.aggregate_dataset)
+
+            def new_chunks():
+                for parser in parsers:
+                    for chunk in parser.iter_chunks(chunksize):
+                        data = parser.filter_new_rows(watermarks)
+                        METRICS.add(
+                            parser.stage("filter"),
+                            rows_in=len(chunk),
+                            rows_out=len(data),
+                        )
+                        yield data
+
+            def track(blocks):
+                for block in blocks:
+                    watermarks.update(block)
+                    yield block
+
+            if storage.incremental:
+                # Watermarks advance once every chunk has been upserted
+                written = []
+                for data in new_chunks():
+                    if not data.empty:
+                        first_parser.upsert_to_aggregates(data)
+                        written.append(data[["Card", "Date", "Description", "ID"]])
+                if written:
+                    watermarks.update(pd.concat(written, ignore_index=True))
+                watermarks.save(storage.version(first_parser.aggregate_dataset))
+                return
+
+            with tempfile.TemporaryDirectory(prefix="expense-tracker-") as tmp_dir:
+                runs = write_runs(new_chunks(), Path(tmp_dir))
+                if not runs:
+                    LOGGER.warning("No data to save.")
+                    return
+                # One block per run is held in memory during the merge
+                blocksize = max(chunksize // (len(runs) + 1), MIN_BLOCK_ROWS)
+                aggregate = (
+                    sort_chunk(upgrade_legacy_ids(chunk))
+                    for chunk in storage.read_chunks(
+                        first_parser.aggregate_dataset, blocksize
+                    )
+                )
+                first = next(aggregate, None)
+                columns = [] if first is None else list(first.columns)
+                for run in runs:
+                    columns += [
+                        col
+                        for col in pd.read_csv(run, sep="\t", nrows=0).columns
+                        if col not in columns
+                    ]
+                sources = [
+                    itertools.chain([first] if first is not None else [], aggregate),
+                    *(read_run(run, blocksize) for run in runs),
+                ]
+                storage.write_chunks(
+                    first_parser.aggregate_dataset,
+                    (
+                        block.reindex(columns=columns)
+                        for block in track(drop_duplicate_ids(merge_sorted(sources)))
+                    ),
+                )
+            watermarks.save(storage.version(first_parser.aggregate_dataset))
+            LOGGER.info(
+                f"Merged {len(runs)} sorted runs into {first_parser.aggregate_file}"
+            )
+
+    def save_to_global_aggregate(self):
+        """
+        Bring the global aggregate up to date with the bank aggregate.
+        If the global aggregate holds the rows of the bank aggregate as it was
+        before the last merge (see AggregateSources), only the rows that merge
+        added are inserted into it. Otherwise the bank aggregate's rows that
+        are not in it yet are merged in, and it is rewritten.
+        The rows added are indexed for search as well.
+        Incremental storage backends already upserted the new rows into the
+        global aggregate when saving the bank aggregate, the bank aggregate
+        is only upserted in full if the global aggregate misses it.
+        """
+        if self.storage.incremental:
+            version = self.storage.version(self.aggregate_dataset)
+            self.upsert_to_global_aggregate(pd.DataFrame(), version)
+            return
+        with (
+            self.storage.lock(self.global_aggregate_dataset),
+            METRICS.timer(self.stage("save_to_global_aggregate")) as counters,
+        ):
+            sources = AggregateSources.load(self.storage, self.global_aggregate_dataset)
+            version = self.storage.version(self.aggregate_dataset)
+            if sources.holds(self.bank, version):
+                LOGGER.info(f"{self.global_aggregate_file} is up to date")
+                return
+            base = self.storage.version(self.global_aggregate_dataset)
+            if self.delta is not None and sources.holds(self.bank, self.delta_base):
+                added = self.delta
+                counters["rows_in"] += len(self.delta)
+                if self.insert_to_global_aggregate(self.delta):
+                    counters["appends"] += 1
+                else:
+                    counters["inserts"] += 1
+                counters["rows_out"] += len(self.delta)
+            else:
+                local_data = self.load_aggregate()
+                existing = self.load_global_aggregate()
+                global_data = upgrade_legacy_ids(existing)
+                counters["rows_in"] += len(local_data)
+                if not global_data.empty:
+                    # Only rows whose ID is not in the global aggregate yet are added
+                    new_data = local_data[~local_data["ID"].isin(global_data["ID"])]
+                    data = pd.concat([global_data, new_data], ignore_index=True)
+                else:
+                    new_data = local_data
+                    data = local_data
+                counters["dedup_hits"] += len(local_data) - len(new_data)
+                data.drop_duplicates(subset=["ID"], inplace=True)
+                data.sort_values(by=["Date", "Description"], inplace=True)
+                self.write_global_aggregate(data)
+                counters["rewrites"] += 1
+                counters["rows_out"] += len(data)
+                # Upgraded legacy IDs change rows the index holds, it is rebuilt
+                added = new_data if global_data is existing else None
+            counters["bytes_written"] += file_size(self.global_aggregate_file)
+            sources.banks[self.bank] = version
+            sources.save(self.storage.version(self.global_aggregate_dataset))
+            if added is not None:
+                SearchIndex(self.global_aggregate_dataset, self.storage).add(
+                    added, base
+                )
+
+    def insert_to_global_aggregate(self, data: pd.DataFrame) -> bool:
+        """
+        Add rows new to the bank aggregate to the global aggregate, appended
+        in place if the backend supports it and they sort after its last row,
+        otherwise inserted by the backend. Returns True if they were appended.
+        """
+        data = data.sort_values(by=["Date", "Description"])
+        dataset = self.global_aggregate_dataset
+        watermarks = Watermarks.load(self.storage, dataset)
+        appended = False
+        if self.storage.appendable and watermarks.sorts_after(data):
+            try:
+                self.storage.append(dataset, data)
+                appended = True
+            except ValueError as e:
+                LOGGER.debug(f"Cannot append to {self.global_aggregate_file}: {e}")
+        if not appended:
+            self.storage.insert(dataset, data)
+        watermarks.update(data)
+        watermarks.save(self.storage.version(dataset))
+        LOGGER.info(f"Added {len(data)} new rows to {self.global_aggregate_file}")
+        return appended
+
+
+class PDFParser(AggregateParser):
+    def __init__(
+        self,
+        pdf_name: str,
+        bank: str = "WellsFargo",
+        data_type: Literal["Statements"] = "Statements",
+        *args,
+        **kwargs,
+    ):
+        super().__init__(bank, data_type, *args, **kwargs)
         self.tables = []
         self.id = None
         self.year = None
-        self.bank = bank
-        self.data_path = data_path
         self.pdf_name = pdf_name
-        self.pdf_path = self.data_path / self.bank / pdf_name
-        self.aggregate_file = data_path / self.bank / "aggregate.tsv"
+        self.pdf_path = self.data_path / self.bank / self.data_type / pdf_name
 
     @abstractmethod
     def parse(self):
@@ -35,13 +466,12 @@ class PDFParser(ABC):
         """
         pass
 
-    @abstractmethod
-    def save_to_aggregate(self):
+    def load_df(self) -> pd.DataFrame:
         """
-        Save the parsed DataFrame to the aggregate file.
-        If the file does not exist, it will be created.
+        Parse the PDF into a DataFrame, so PDF parsers can be used wherever
+        a CSV parser is expected.
         """
-        pass
+        return self.parse()
 
     def save_to_tsv(self, filename: str | None = None):
         """
@@ -50,49 +480,121 @@ class PDFParser(ABC):
         if filename is None:
             filename = str(self.pdf_path).split(".")[0] + ".tsv"
         if hasattr(self, "df") and not self.df.empty:
-            self.df.to_csv(filename, header=True, index=False, sep="\t")
+            encode_amounts(self.df).to_csv(filename, header=True, index=False, sep="\t")
             LOGGER.info(f"Data saved to {filename}")
         else:
             LOGGER.warning("No data to save.")
 
 
-class CSVParser(ABC):
+class CSVParser(AggregateParser):
+    # Whether the parser can read its file in chunks with iter_chunks()
+    streamable: bool = False
+    # Source column with the transaction date, before normalization
+    date_column: str = "Date"
+
     def __init__(
         self,
         csv_name: str,
-        bank: Literal[
-            "WellsFargo", "Chase", "CapitalOne", "Ally", "Deserve", "Syncrony"
-        ] = "WellsFargo",
+        bank: str = "WellsFargo",
         data_type: Literal[
             "YearEnd", "Statements", "AccountActivity"
         ] = "AccountActivity",
         *args,
         **kwargs,
     ):
+        super().__init__(bank, data_type, *args, **kwargs)
         self.csv_name = csv_name
-        self.bank = bank
-        self.data_type = data_type
-        self.data_path = data_path
-        self.global_aggregate_file = data_path / "global_aggregate.tsv"
-        self.aggregate_file = data_path / self.bank / "aggregate.tsv"
         self.csv_file_path = self.data_path / self.bank / self.data_type / self.csv_name
-        self.add_new_only: bool = kwargs.get("add_new_only", True)
+
+    def read_options(self) -> dict:
+        """
+        Keyword arguments for pd.read_csv() to read the source file.
+        """
+        return {}
+
+    def normalize(self) -> pd.DataFrame:
+        """
+        Normalize self.df, a whole file or one chunk of it,
+        into the aggregate schema.
+        """
+        return self.df
+
+    def iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        reader = pd.read_csv(
+            self.csv_file_path, chunksize=chunksize, **self.read_options()
+        )
+        for chunk in align_chunks(reader, self.date_column):
+            self.df = chunk
+            yield self.normalize()
 
     @abstractmethod
     def load_df(self) -> pd.DataFrame:
         pass
 
-    @abstractmethod
-    def save_to_aggregate(self):
+
+class SpecParser(CSVParser):
+    """
+    Parser of CSV exports described by a BankSpec (utils.specs), which maps
+    the export onto the aggregate schema, so supporting a bank's CSV export
+    only takes registering its spec.
+    """
+
+    streamable = True
+
+    def __init__(
+        self,
+        csv_name: str,
+        bank: str = "WellsFargo",
+        data_type: Literal["YearEnd", "AccountActivity"] = "AccountActivity",
+        *args,
+        **kwargs,
+    ):
+        super().__init__(csv_name, bank, data_type, *args, **kwargs)
+        self.spec = get_spec(self.bank, self.data_type)
+        self.date_column = self.spec.date_column
+        self.card_id = self.spec.normalizer.card_from_name(self.csv_name)
+
+    def read_options(self) -> dict:
+        return self.spec.read_options()
+
+    def normalize(self) -> pd.DataFrame:
+        self.df = self.spec.normalizer(self.df, self.card_id)
+        self.categorize()
+        self.create_id()
+        self.df = apply_schema(self.df)
+        return self.df
+
+    def create_id(self):
         """
-        Save the parsed DataFrame to the aggregate file.
-        If the file does not exist, it will be created.
+        Create a deterministic ID for each transaction from its content,
+        so re-imported transactions get the same ID and can be deduplicated.
+        Must be called once Bank, Card, Date, Amount and Description are final.
         """
-        pass
+        self.df["ID"] = transaction_ids(self.df)
 
-    def save_to_global_aggregate(self):
+    def load_df(self) -> pd.DataFrame:
+        """
+        Load the CSV file into a DataFrame.
+        """
+        with METRICS.timer(self.stage("read")) as counters:
+            self.df = pd.read_csv(self.csv_file_path, **self.read_options())
+            counters["rows_out"] += len(self.df)
+        if self.df.empty:
+            LOGGER.warning(f"No data found in {self.csv_name}.")
+        else:
+            with METRICS.timer(self.stage("transform")) as counters:
+                counters["rows_in"] += len(self.df)
+                self.normalize()
+                counters["rows_out"] += len(self.df)
+        return self.df
+
+    def save_to_aggregate(self):
         """
-        Save the parsed DataFrame to the global aggregate file.
+        Save the parsed DataFrame to the aggregate file.
         If the file does not exist, it will be created.
+        If it exists, new data will be appended, and duplicates will be removed.
         """
-        pass
+        if hasattr(self, "df") and not self.df.empty:
+            self.save_batch_to_aggregate([self])
+        else:
+            LOGGER.warning("No data to save.")
@@ -0,0 +1,101 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Literal
+
+import pandas as pd
+
+from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils.manifest import file_hash
+
+cache_path = Path.cwd() / "data" / ".cache" / "pdf_tables"
+
+
+def page_count(pdf_path: Path) -> int:
+    """
+    Get the number of pages in a PDF.
+    """
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def extract_page_tables(
+    pdf_path: Path, page: int, flavor: Literal["stream", "lattice"] = "stream"
+) -> list[pd.DataFrame]:
+    """
+    Extract the tables of a single PDF page with camelot.
+    Defined at module level so it can run in a worker process.
+    camelot is imported here, as loading it (OpenCV, pdfminer) takes longer
+    than parsing a CSV export.
+    """
+    import camelot.io
+
+    tables = camelot.io.read_pdf(str(pdf_path), pages=str(page), flavor=flavor)
+    return [table.df for table in tables]
+
+
+class PDFTableExtractor:
+    """
+    Extract the tables of a PDF page by page, optionally in parallel, caching
+    the tables of each page keyed by the PDF's content hash and page number,
+    so reprocessing an already seen statement does not run camelot again.
+    """
+
+    def __init__(
+        self,
+        pdf_path: Path,
+        flavor: Literal["stream", "lattice"] = "stream",
+        workers: int | None = None,
+        cache_dir: Path | None = None,
+    ):
+        self.pdf_path = pdf_path
+        self.flavor = flavor
+        self.workers = workers or int(os.environ.get("PDF_WORKERS") or 1)
+        self.digest = file_hash(pdf_path)
+        self.cache_dir = (cache_dir or cache_path) / self.digest
+
+    def cache_file(self, page: int) -> Path:
+        return self.cache_dir / f"{self.flavor}-page-{page}.pkl"
+
+    def extract(self) -> list[pd.DataFrame]:
+        """
+        Extract the tables of all pages, in page order.
+        """
+        pages = range(1, page_count(self.pdf_path) + 1)
+        missing = [page for page in pages if not self.cache_file(page).exists()]
+        LOGGER.debug(
+            f"{self.pdf_path.name}: {len(pages)} pages, "
+            f"{len(pages) - len(missing)} cached"
+        )
+        if missing:
+            if self.workers > 1 and len(missing) > 1:
+                with ProcessPoolExecutor(
+                    max_workers=min(self.workers, len(missing))
+                ) as executor:
+                    results = executor.map(
+                        extract_page_tables,
+                        [self.pdf_path] * len(missing),
+                        missing,
+                        [self.flavor] * len(missing),
+                    )
+                    extracted = dict(zip(missing, results))
+            else:
+                extracted = {
+                    page: extract_page_tables(self.pdf_path, page, self.flavor)
+                    for page in missing
+                }
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for page, tables in extracted.items():
+                tmp_file = self.cache_file(page).with_suffix(".tmp")
+                pd.to_pickle(tables, tmp_file)
+                tmp_file.replace(self.cache_file(page))
+
+        tables = []
+        for page in pages:
+            tables.extend(pd.read_pickle(self.cache_file(page)))
+        return tables
@@ -1,10 +1,17 @@
+import importlib
+import os
 import re
 from abc import ABC
+from concurrent.futures import Executor, Future
 from pathlib import Path
 from typing import Literal, Type
 
 from expense_tracker.utils.logger import LOGGER
-from expense_tracker.utils.parser import CSVParser
+from expense_tracker.utils.manifest import IngestionManifest
+from expense_tracker.utils.metrics import METRICS, file_size
+from expense_tracker.utils.parser import AggregateParser
+from expense_tracker.utils.specs import get_spec
+from expense_tracker.utils.storage import get_storage
 
 
 class ProcessingUtils(ABC):
@@ -12,84 +19,224 @@ class ProcessingUtils(ABC):
 
     def __init__(
         self,
-        bank: Literal[
-            "WellsFargo", "Chase", "CapitalOne", "Ally", "Deserve", "Syncrony"
-        ],
-        parser: Type[CSVParser],
+        bank: str,
+        parser: Type[AggregateParser],
         data_type: Literal[
             "YearEnd", "AccountActivity", "Statements"
         ] = "AccountActivity",
         *args,
         **kwargs,
     ):
-        self.bank: Literal[
-            "WellsFargo", "Chase", "CapitalOne", "Ally", "Deserve", "Syncrony"
-        ] = bank
+        self.bank = bank
         self.data_type: Literal["YearEnd", "AccountActivity", "Statements"] = data_type
         self.data_path = Path.cwd() / "data" / self.bank / data_type
-        self.aggregate_file = self.data_path / "aggregate.tsv"
+        self.storage = get_storage()
+        self.aggregate_dataset = Path.cwd() / "data" / self.bank / "aggregate"
+        self.global_aggregate_dataset = Path.cwd() / "data" / "global_aggregate"
+        self.aggregate_file = self.storage.location(self.aggregate_dataset)
         self.parser = parser
-        self.global_aggregate_path = Path.cwd() / "data" / "global_aggregate.tsv"
+        self.global_aggregate_path = self.storage.location(
+            self.global_aggregate_dataset
+        )
+        self.manifest = IngestionManifest(self.data_path / ".manifest.json")
+        self.skipped: list[Path] = []
+        self.batch: bool = kwargs.get("batch", True)
+        # Rows per chunk when streaming large CSV files, 0 to load files whole
+        self.chunksize: int = kwargs.get("chunksize") or int(
+            os.environ.get("STREAM_CHUNK_ROWS") or 0
+        )
+        self.futures: list[Future] = []
 
     def load_directory(self):
         """
         Load the directory for the specified bank.
-        If the directory does not exist, it will be created.
+        If the directory does not exist, it will be created, except for
+        Statements, which most banks and users do not have.
+        Files recorded in the ingestion manifest as unchanged are skipped.
         """
         if not self.data_path.exists():
+            self.data = []
+            if self.data_type == "Statements":
+                LOGGER.debug(f"No directory {self.data_path}, skipping.")
+                return
             self.data_path.mkdir(parents=True, exist_ok=True)
             LOGGER.info(f"Directory created: {self.data_path}")
         else:
             LOGGER.info(f"Directory already exists: {self.data_path}")
-            LOGGER.info(f"Files in directory: {list(self.data_path.iterdir())}")
-            self.data = [
+            LOGGER.debug(f"Files in directory: {list(self.data_path.iterdir())}")
+            # The manifest is only valid while the aggregates it fed still exist
+            if not (
+                self.storage.exists(self.aggregate_dataset)
+                and self.storage.exists(self.global_aggregate_dataset)
+            ):
+                self.manifest.clear()
+            suffix = r".pdf" if self.data_type == "Statements" else r".csv"
+            files = [
                 file
                 for file in self.data_path.iterdir()
-                if file.is_file() and re.search(r".csv", file.suffix, re.IGNORECASE)
+                if file.is_file() and re.search(suffix, file.suffix, re.IGNORECASE)
             ]
+            self.data = []
+            self.skipped = []
+            for file in files:
+                if self.manifest.is_current(file):
+                    self.skipped.append(file)
+                else:
+                    self.data.append(file)
+            LOGGER.info(
+                f"{len(self.data)} new or changed files, "
+                f"{len(self.skipped)} unchanged files skipped."
+            )
+            METRICS.add(
+                f"{self.bank}/{self.data_type}/load_directory",
+                files=len(self.data),
+                skipped=len(self.skipped),
+            )
+
+    @property
+    def streaming(self) -> bool:
+        """
+        Whether files are streamed into the aggregate in chunks.
+        """
+        return self.chunksize > 0 and getattr(self.parser, "streamable", False)
+
+    def stream_files(self):
+        """
+        Stream the loaded files into the aggregate in chunks of
+        self.chunksize rows, so memory use does not grow with their size.
+        """
+        parsers = [
+            self.parser(file.name, self.bank, self.data_type) for file in self.data
+        ]
+        with METRICS.timer(f"{self.bank}/{self.data_type}/stream") as counters:
+            self.parser.stream_batch_to_aggregate(parsers, self.chunksize)
+            counters["files"] += len(self.data)
+            counters["bytes_read"] += sum(file_size(file) for file in self.data)
+            counters["bytes_written"] += file_size(self.aggregate_file)
+        for file in self.data:
+            self.manifest.record(file)
+        LOGGER.info(f"Streamed data from {len(parsers)} files in a single merge")
+        parsers[-1].save_to_global_aggregate()
+        self.manifest.save()
 
-    def parse_files(self):
+    def submit_files(self, executor: Executor):
+        """
+        Start parsing the loaded files in a worker pool.
+        The results are collected and merged by parse_files().
+        Streamed files are parsed by parse_files() itself.
+        """
+        if self.streaming:
+            return
+        self.futures = [
+            executor.submit(
+                load_file, self.parser, file.name, self.bank, self.data_type
+            )
+            for file in getattr(self, "data", [])
+        ]
+
+    def parse_files(self, executor: Executor | None = None):
         """
         Parse all files in the directory using the specified parser.
+        In batch mode (the default) all parsed files are merged into the
+        aggregate in a single pass instead of one read/rewrite per file.
+        If an executor is given (or submit_files() was called before), files are
+        parsed concurrently and only the merge runs in this process, so the
+        aggregate files have a single writer.
+        With a chunk size (STREAM_CHUNK_ROWS), streamable files are instead
+        merged chunk by chunk with bounded memory.
         """
-        if not hasattr(self, "data") or not self.data:
-            LOGGER.warning(
-                "No CSV files found to parse. Run load_directory() first "
-                "or make sure all files are in data/bank/data_type."
+        if self.skipped and not getattr(self, "data", None):
+            LOGGER.info(
+                f"All {len(self.skipped)} files unchanged since last ingest, "
+                "nothing to parse."
             )
             return
 
-        for file in self.data:
-            parser_instance = self.parser(file.name, self.bank, self.data_type)
-            df = parser_instance.load_df()
-            if not df.empty:
+        if not hasattr(self, "data"):
+            LOGGER.warning("No files loaded to parse. Run load_directory() first.")
+            return
+
+        if not self.data:
+            # A missing Statements directory was already reported
+            if not self.data_path.exists():
+                return
+            LOGGER.info(
+                f"No files found to parse in {self.data_path}, "
+                "make sure all files are in data/bank/data_type."
+            )
+            return
+
+        if self.streaming:
+            self.stream_files()
+            return
+
+        if executor is not None and not self.futures:
+            self.submit_files(executor)
+        if self.futures:
+            loaded = (future.result() for future in self.futures)
+        else:
+            loaded = (
+                load_file(self.parser, file.name, self.bank, self.data_type)
+                for file in self.data
+            )
+
+        parsers = []
+        for file, parser_instance in zip(self.data, loaded):
+            METRICS.merge(parser_instance.metrics)
+            df = parser_instance.df
+            if df.empty:
+                LOGGER.warning(f"No data found in {file.name}")
+            elif self.batch:
+                parsers.append(parser_instance)
+                LOGGER.info(f"Parsed data from {file.name}")
+            else:
                 parser_instance.save_to_aggregate()
                 LOGGER.info(f"Parsed and saved data from {file.name}")
-            else:
-                LOGGER.warning(f"No data found in {file.name}")
+            self.manifest.record(file)
+        if parsers:
+            self.parser.save_batch_to_aggregate(parsers)
+            LOGGER.info(f"Saved data from {len(parsers)} files in a single merge")
+            # The first parser holds the rows the merge added
+            parser_instance = parsers[0]
         parser_instance.save_to_global_aggregate()
+        self.manifest.save()
+        self.futures = []
 
 
-def get_parser_class(
-    bank: Literal["WellsFargo", "Chase", "CapitalOne"],
-) -> Type[CSVParser]:
+def load_file(
+    parser: Type[AggregateParser],
+    file_name: str,
+    bank: str,
+    data_type: Literal["YearEnd", "AccountActivity", "Statements"],
+) -> AggregateParser:
     """
-    Get the parser class for the specified bank.
+    Parse a single file and return the parser holding its DataFrame.
+    Defined at module level so it can run in a worker process.
     """
-    if bank == "WellsFargo":
-        from expense_tracker.wells_fargo.parser import WellsFargoAccountSummaryParser
-
-        return WellsFargoAccountSummaryParser
-    elif bank == "Chase":
-        from expense_tracker.chase.parser import ChaseAccountSummaryParser
+    parser_instance = parser(file_name, bank, data_type)
+    with METRICS.capture() as stages:
+        with METRICS.timer(parser_instance.stage("load_df")) as counters:
+            parser_instance.load_df()
+            counters["files"] += 1
+            counters["rows_out"] += len(parser_instance.df)
+            counters["bytes_read"] += file_size(
+                parser_instance.data_path / bank / data_type / file_name
+            )
+    # Plain dicts, so the metrics can be sent back from a worker process
+    parser_instance.metrics = {stage: dict(c) for stage, c in stages.items()}
+    return parser_instance
 
-        return ChaseAccountSummaryParser
-    elif bank == "CapitalOne":
-        from expense_tracker.capital_one.parser import CapitalOneAccountSummaryParser
 
-        return CapitalOneAccountSummaryParser
-    else:
-        raise ValueError(f"Unsupported bank: {bank}")
+def get_parser_class(
+    bank: str,
+    data_type: Literal["YearEnd", "AccountActivity", "Statements"] = "AccountActivity",
+) -> Type[AggregateParser]:
+    """
+    Get the parser class for the specified bank and data type, from its
+    spec in utils.specs. Only the module of the requested parser is imported.
+    """
+    module, name = get_spec(bank, data_type).parser.split(":")
+    return getattr(importlib.import_module(f"expense_tracker.{module}"), name)
 
 
 if __name__ == "__main__":
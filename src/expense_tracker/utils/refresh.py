@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from expense_tracker.utils.logger import LOGGER
+
+
+def data_signature(banks: list[str], data_types: list[str], root: Path | None = None):
+    """
+    Compute a cheap signature of the statement files of all banks, based on
+    file names, sizes and mtimes. It changes whenever a file is added,
+    removed or modified under data/<bank>/<data_type>.
+    """
+    root = root or Path.cwd() / "data"
+    entries = []
+    for bank in banks:
+        for data_type in data_types:
+            directory = root / bank / data_type
+            if not directory.is_dir():
+                continue
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.startswith("."):
+                        stat = entry.stat()
+                        entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+    return hash(tuple(sorted(entries)))
+
+
+class RefreshWorker(threading.Thread):
+    """
+    Background thread that polls the statement directories and re-runs
+    ingestion when they change, so the dashboard never waits on parsing.
+    workers is the number of parser processes, INGEST_WORKERS by default.
+    """
+
+    def __init__(self, interval: float | None = None, workers: int | None = None):
+        super().__init__(name="expense-tracker-refresh", daemon=True)
+        self.interval = interval or float(os.environ.get("REFRESH_INTERVAL") or 5)
+        self.workers = workers
+        self.last_refresh: datetime | None = None
+        self.last_error: Exception | None = None
+        self.refreshing = threading.Event()
+        self.stopped = threading.Event()
+        self.signature = None
+
+    def refresh_if_changed(self) -> bool:
+        """
+        Run ingestion if the statement files changed since the last run.
+        Returns True if ingestion ran.
+        """
+        from expense_tracker.main import DATA_TYPES, fetch_data, load_banks
+
+        signature = data_signature(load_banks(), DATA_TYPES)
+        if signature == self.signature:
+            return False
+        self.refreshing.set()
+        try:
+            fetch_data(self.workers)
+            self.signature = signature
+            self.last_refresh = datetime.now()
+            self.last_error = None
+        except Exception as e:
+            LOGGER.exception("Background refresh failed")
+            self.last_error = e
+        finally:
+            self.refreshing.clear()
+        return True
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.refresh_if_changed()
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def watch(interval: float | None = None, workers: int | None = None):
+    """
+    Run ingestion in the foreground whenever the statement files change,
+    with the given number of parser processes.
+    """
+    worker = RefreshWorker(interval, workers)
+    LOGGER.info(f"Watching data/ for changes every {worker.interval:g}s...")
+    try:
+        while True:
+            if worker.refresh_if_changed():
+                LOGGER.info(f"Data refreshed at {worker.last_refresh}")
+            time.sleep(worker.interval)
+    except KeyboardInterrupt:
+        LOGGER.info("Stopped watching.")
@@ -0,0 +1,132 @@
+from pathlib import Path
+
+import pandas as pd
+
+from expense_tracker.query import UNCATEGORIZED, Query
+from expense_tracker.utils.storage import SQLiteStorage
+
+
+class Rollups:
+    """
+    Precomputed dashboard aggregates over the global dataset.
+    The data is sorted by month once, so each month is a contiguous slice and
+    a month view only touches its own rows.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        data = data.copy()
+        data["Month"] = pd.to_datetime(data["Date"]).dt.strftime("%Y-%m")
+        data.sort_values(by=["Month", "Date"], inplace=True, kind="stable")
+        data.reset_index(drop=True, inplace=True)
+        self.data = data
+        self.months: list[str] = data["Month"].unique().tolist()
+        months = data["Month"].to_numpy()
+        starts = months.searchsorted(self.months, side="left")
+        stops = months.searchsorted(self.months, side="right")
+        self.bounds: dict[str, tuple[int, int]] = {
+            month: (int(start), int(stop))
+            for month, start, stop in zip(self.months, starts, stops)
+        }
+        self.monthly = (
+            data.groupby("Month", sort=True)["Amount"]
+            .sum()
+            .reset_index()
+            .rename(columns={"Amount": "Spending"})
+        )
+        self.by_category = (
+            data.groupby(["Month", "Category"], sort=True, observed=True)["Amount"]
+            .sum()
+            .reset_index()
+        )
+        self.by_bank = (
+            data.groupby(["Month", "Bank"], sort=True, observed=True)["Amount"]
+            .sum()
+            .reset_index()
+        )
+
+    def month_data(self, month: str) -> pd.DataFrame:
+        """
+        Get the transactions of a month.
+        """
+        start, stop = self.bounds.get(month, (0, 0))
+        return self.data.iloc[start:stop]
+
+    def month_categories(self, month: str) -> pd.DataFrame:
+        """
+        Get the spending per category of a month.
+        """
+        return self.by_category[self.by_category["Month"] == month].drop(
+            columns=["Month"]
+        )
+
+
+class SQLRollups(Rollups):
+    """
+    Dashboard aggregates computed by the SQLite store. Only the aggregates
+    are loaded up front, and a month's transactions are queried by date
+    range when that month is displayed. Both only cover the rows that pass
+    the query's filters.
+    """
+
+    def __init__(
+        self,
+        storage: SQLiteStorage,
+        dataset: Path,
+        query: Query | None = None,
+        columns: list[str] | None = None,
+    ):
+        self.storage = storage
+        self.dataset = dataset
+        self.query = query or Query()
+        self.columns = columns or [
+            "Date",
+            "Description",
+            "Category",
+            "Amount",
+            "Card",
+            "Bank",
+        ]
+        self.monthly = self.aggregate([], "Spending")
+        self.by_category = self.aggregate(["Category"])
+        self.by_bank = self.aggregate(["Bank"])
+        self.months = self.monthly["Month"].tolist()
+
+    @staticmethod
+    def select(column: str) -> str:
+        if column == "Category":
+            return f"COALESCE(Category, '{UNCATEGORIZED}') AS Category"
+        return SQLiteStorage.quote(column)
+
+    def aggregate(self, by: list[str], name: str = "Amount") -> pd.DataFrame:
+        """
+        Sum the amounts per month and the given columns.
+        """
+        keys = ", ".join(str(i) for i in range(1, len(by) + 2))
+        where, params = self.query.sql()
+        data = self.storage.query(
+            self.dataset,
+            f"SELECT substr(Date, 1, 7) AS Month, "
+            f"{''.join(self.select(col) + ', ' for col in by)}"
+            f"SUM(Amount) AS {name} FROM {SQLiteStorage.table} "
+            f"WHERE {where} GROUP BY {keys} ORDER BY {keys}",
+            params,
+        )
+        if data.empty:
+            return pd.DataFrame(columns=["Month", *by, name])
+        return data
+
+    def month_data(self, month: str) -> pd.DataFrame:
+        period = pd.Period(month, freq="M")
+        where, params = self.query.sql()
+        data = self.storage.query(
+            self.dataset,
+            f"SELECT {', '.join(map(self.select, self.columns))}, "
+            f"substr(Date, 1, 7) AS Month FROM {SQLiteStorage.table} "
+            f"WHERE Date >= ? AND Date < ? AND {where} ORDER BY Date",
+            (f"{period}-01", f"{period + 1}-01", *params),
+        )
+        if data.empty:
+            data = pd.DataFrame(columns=[*self.columns, "Month"])
+        data["Date"] = pd.to_datetime(data["Date"])
+        # LIKE only matches descriptions case-insensitively for ASCII
+        return self.query.apply(data)
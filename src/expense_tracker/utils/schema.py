@@ -0,0 +1,90 @@
+from functools import cache
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+# Low-cardinality columns, stored as categoricals
+CATEGORICAL_COLUMNS = ["Bank", "Card", "Category", "Type"]
+# Free text and IDs, stored as Arrow strings when pyarrow is installed
+TEXT_COLUMNS = ["Description", "ID"]
+# Type of the rows that move money between the user's own accounts, e.g.
+# card payments, kept for the duplicate report but not counted as spending
+TRANSFER = "Transfer"
+
+
+@cache
+def text_dtype():
+    """
+    Dtype of the text columns: Arrow-backed strings, with NaN for missing
+    values like object columns, or object if pyarrow is not installed.
+    """
+    if find_spec("pyarrow") is None:
+        return object
+    return pd.StringDtype("pyarrow", na_value=np.nan)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the columns of a transactions frame to their compact canonical
+    dtypes, in place:
+
+    - Date: datetime64, never Python dates.
+    - Amount: int64 cents, as converted at ingest.
+    - Bank, Card, Category, Type: categoricals, Card with the smallest
+      integer categories.
+    - Description, ID: text_dtype().
+    - Other numeric columns are downcast to the smallest type that fits.
+
+    Columns already in their canonical dtype are left as they are, so
+    applying the schema again is cheap.
+    """
+    for col in df.columns:
+        values = df[col]
+        if col == "Date":
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                df[col] = pd.to_datetime(values)
+        elif col == "Amount":
+            if values.dtype != np.int64:
+                df[col] = values.fillna(0).astype(np.int64)
+        elif col in CATEGORICAL_COLUMNS:
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                continue
+            if col == "Card":
+                values = pd.to_numeric(values, downcast="integer")
+            df[col] = values.astype("category")
+        elif col in TEXT_COLUMNS:
+            if values.dtype != text_dtype():
+                df[col] = values.astype(text_dtype())
+        elif pd.api.types.is_integer_dtype(values):
+            df[col] = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values):
+            df[col] = pd.to_numeric(values, downcast="float")
+    return df
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Memory footprint of each column of a transactions frame: its dtype and
+    bytes, and the bytes it would take with text and categorical columns
+    held as Python objects, as they were before the schema. The last row
+    is the total.
+    """
+    legacy = df.astype(
+        {
+            col: object
+            for col in df.columns
+            if isinstance(df[col].dtype, pd.CategoricalDtype)
+            or pd.api.types.is_string_dtype(df[col])
+        }
+    )
+    report = pd.DataFrame(
+        {
+            "dtype": df.dtypes.astype(str),
+            "bytes": df.memory_usage(index=False, deep=True),
+            "object_bytes": legacy.memory_usage(index=False, deep=True),
+        }
+    )
+    report.loc["Total"] = ["", report["bytes"].sum(), report["object_bytes"].sum()]
+    report["bytes_per_row"] = (report["bytes"] / max(len(df), 1)).round(1)
+    return report
@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils.storage import Storage
+
+
+class AggregateSources:
+    """
+    The version of each bank aggregate whose rows the global aggregate
+    holds, persisted next to the global aggregate and tied to its storage
+    version. A bank recorded at the version one of its merges started from
+    brings the global aggregate up to date by inserting only the rows that
+    merge added. Any other bank, or a global aggregate written by something
+    else, is merged in full.
+    """
+
+    def __init__(self, sources_file: Path):
+        self.sources_file = sources_file
+        self.banks: dict[str, str] = {}
+
+    @classmethod
+    def load(cls, storage: Storage, dataset: Path) -> "AggregateSources":
+        """
+        Load the sources of a global dataset. They are empty if the file is
+        missing or was saved for another version of the dataset.
+        """
+        sources = cls(dataset.with_suffix(".sources.json"))
+        version = storage.version(dataset)
+        if version is None or not sources.sources_file.exists():
+            return sources
+        try:
+            with open(sources.sources_file) as f:
+                data = json.load(f)
+            if data["version"] == version:
+                sources.banks = dict(data["banks"])
+        except (OSError, KeyError, ValueError):
+            LOGGER.warning(f"Could not read {sources.sources_file}.")
+        return sources
+
+    def holds(self, bank: str, version: str | None) -> bool:
+        """
+        Check whether the global aggregate holds exactly the rows of the
+        given version of a bank aggregate.
+        """
+        return version is not None and self.banks.get(bank) == version
+
+    def save(self, version: str | None):
+        """
+        Save the sources for the given version of the global aggregate.
+        """
+        data = {"version": version, "banks": self.banks}
+        self.sources_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.sources_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(data, f, indent=2)
+        tmp_file.replace(self.sources_file)
+        LOGGER.debug(f"Aggregate sources saved to {self.sources_file}")
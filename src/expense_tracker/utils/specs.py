@@ -0,0 +1,252 @@
+import re
+from typing import Literal
+
+import pandas as pd
+
+from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils.schema import TRANSFER
+from expense_tracker.utils.transforms import last_digits, to_cents
+
+# Card payments are counted when the card is charged, not when it is paid
+PAYMENTS = r"\b(?:payment|thank you)\b"
+
+
+class BankSpec:
+    """
+    Declarative description of a bank export and how it maps onto the
+    aggregate schema (Date, Description, Amount, Card, Bank, ...), so that a
+    new bank is added by registering a spec instead of writing a parser:
+
+    - parser: parser class as "module:class" under expense_tracker.
+      Exports of a spec without a parser are read by utils.parser:SpecParser.
+    - names: column names of exports without a header row.
+    - date_columns: columns parsed as dates, the first is the transaction date.
+    - date_format: strftime format of the dates, inferred if None.
+    - drop: source columns to drop.
+    - rename: source columns to rename to aggregate columns.
+    - charge_sign: sign of charges in the export. Amounts are flipped when
+      it is -1, so that spending is positive.
+    - card_column: column holding the card, whose last four digits are kept.
+    - card_name_pattern: regex whose first match in the file name is the card.
+    - card_names: card of files whose name matches a regex, first match wins.
+    - transfers: description regexes of payments and transfers between the
+      user's own accounts, each mapped to the cards it applies to, or None
+      for all cards. Matching ignores case. The rows are kept with Type
+      TRANSFER, so they are reported by the duplicate detector but not
+      counted as spending (see Query).
+
+    Rows are sorted by Date and Description, amounts are converted to int64
+    cents. Without a card rule, Card is 0.
+    """
+
+    def __init__(
+        self,
+        bank: str,
+        data_type: Literal["YearEnd", "AccountActivity", "Statements"],
+        parser: str = "utils.parser:SpecParser",
+        names: list[str] | None = None,
+        date_columns: list[str] | None = None,
+        date_format: str | None = None,
+        drop: list[str] | None = None,
+        rename: dict[str, str] | None = None,
+        charge_sign: Literal[1, -1] = -1,
+        card_column: str | None = None,
+        card_name_pattern: str | None = None,
+        card_names: dict[str, int] | None = None,
+        transfers: dict[str, list[int] | None] | None = None,
+    ):
+        self.bank = bank
+        self.data_type = data_type
+        self.parser = parser
+        self.names = names
+        self.date_columns = date_columns or ["Date"]
+        self.date_format = date_format
+        self.drop = drop or []
+        self.rename = rename or {}
+        self.charge_sign = charge_sign
+        self.card_column = card_column
+        self.card_name_pattern = card_name_pattern
+        self.card_names = card_names or {}
+        self.transfers = transfers or {}
+        self._normalizer: "Normalizer | None" = None
+
+    def __repr__(self):
+        return f"BankSpec({self.bank!r}, {self.data_type!r})"
+
+    @property
+    def date_column(self) -> str:
+        """
+        Source column with the transaction date, before renaming.
+        """
+        return self.date_columns[0]
+
+    @property
+    def normalizer(self) -> "Normalizer":
+        """
+        The normalizer of this spec, compiled on first use.
+        """
+        if self._normalizer is None:
+            self._normalizer = Normalizer(self)
+        return self._normalizer
+
+    def read_options(self) -> dict:
+        """
+        Keyword arguments for pd.read_csv() to read an export.
+        """
+        options: dict = {"parse_dates": self.date_columns}
+        if self.names is not None:
+            options["names"] = self.names
+        else:
+            options["header"] = 0
+        if self.date_format is not None:
+            options["date_format"] = self.date_format
+        return options
+
+
+class Normalizer:
+    """
+    Vectorized normalization of the exports of one BankSpec. Every regex of
+    the spec is compiled once, and each step runs on whole columns, so a
+    file or a chunk is normalized without per-row Python code.
+    """
+
+    def __init__(self, spec: BankSpec):
+        self.spec = spec
+        self.card_name_pattern = (
+            re.compile(spec.card_name_pattern) if spec.card_name_pattern else None
+        )
+        self.card_names = [
+            (re.compile(pattern, re.IGNORECASE), card)
+            for pattern, card in spec.card_names.items()
+        ]
+        self.transfers = [
+            (re.compile(pattern, re.IGNORECASE), cards)
+            for pattern, cards in spec.transfers.items()
+        ]
+        self.card_column = spec.rename.get(spec.card_column, spec.card_column)
+
+    def card_from_name(self, file_name: str) -> int:
+        """
+        Get the card of an export from its file name, 0 if unknown.
+        """
+        if self.card_name_pattern is not None:
+            match = self.card_name_pattern.search(file_name)
+            if match:
+                return int(match.group(0))
+        for pattern, card in self.card_names:
+            if pattern.search(file_name):
+                return card
+        LOGGER.debug(f"No card found in {file_name}, defaulting to 0000")
+        return 0000
+
+    def __call__(self, df: pd.DataFrame, card: int = 0000) -> pd.DataFrame:
+        """
+        Map an export, or a chunk of it, onto the aggregate schema.
+        card is the card of the file, used when the spec has no card column.
+        """
+        spec = self.spec
+        df = df.drop(columns=spec.drop, errors="ignore")
+        if self.card_column is None:
+            df["Card"] = card
+        df = df.rename(columns=spec.rename)
+        if self.card_column is not None:
+            # Keep the last four digits, e.g. "Quicksilver ...1234" -> 1234
+            df[self.card_column] = last_digits(df[self.card_column])
+            df = df.rename(columns={self.card_column: "Card"})
+        df = df.sort_values(by=["Date", "Description"])
+        # Amounts are exact int64 cents from here on, spending positive
+        df["Amount"] = to_cents(df["Amount"]) * spec.charge_sign
+        df["Bank"] = spec.bank
+        if self.transfers:
+            # Every chunk gets the column, flagged rows or not
+            types = df.get("Type", pd.Series(None, index=df.index, dtype=object))
+            description = df["Description"].astype("string")
+            transfers = pd.Series(False, index=df.index)
+            for pattern, cards in self.transfers:
+                rows = description.str.contains(pattern, na=False)
+                if cards is not None:
+                    rows &= df["Card"].isin(cards)
+                transfers |= rows
+            df["Type"] = types.astype(object).mask(transfers, TRANSFER)
+        return df
+
+
+BANK_SPECS: dict[str, dict[str, BankSpec]] = {}
+
+
+def register(spec: BankSpec) -> BankSpec:
+    """
+    Register a bank spec, replacing any spec of the same bank and data type.
+    """
+    BANK_SPECS.setdefault(spec.bank, {})[spec.data_type] = spec
+    return spec
+
+
+def get_spec(bank: str, data_type: str) -> BankSpec:
+    """
+    Get the spec of a bank and data type.
+    """
+    if bank not in BANK_SPECS:
+        raise ValueError(f"Unsupported bank: {bank}")
+    if data_type not in BANK_SPECS[bank]:
+        raise ValueError(f"Unsupported data type {data_type} for bank: {bank}")
+    return BANK_SPECS[bank][data_type]
+
+
+register(
+    BankSpec(
+        "Chase",
+        "AccountActivity",
+        parser="chase.parser:ChaseAccountSummaryParser",
+        date_columns=["Transaction Date", "Post Date"],
+        drop=["Post Date", "Memo"],
+        rename={"Transaction Date": "Date"},
+        card_name_pattern=r"\d{4}",
+        transfers={PAYMENTS: None},
+    )
+)
+register(
+    BankSpec(
+        "CapitalOne",
+        "AccountActivity",
+        parser="capital_one.parser:CapitalOneAccountSummaryParser",
+        drop=["Post Date", "Memo"],
+        charge_sign=1,
+        card_column="Card",
+        transfers={PAYMENTS: None},
+    )
+)
+register(
+    BankSpec(
+        "WellsFargo",
+        "AccountActivity",
+        parser="wells_fargo.parser:WellsFargoAccountSummaryParser",
+        names=["Date", "Amount", "0", "1", "Description"],
+        drop=["0", "1"],
+        card_names={"journey": 9992, "activecash": 4031, "checking": 5772},
+        transfers={
+            PAYMENTS: None,
+            # Transfers out of checking, counted where they landed
+            r"(?:chase|capital one|wealthfront|wal-mart|wells fargo|tjx)": [5772],
+        },
+    )
+)
+register(
+    BankSpec(
+        "WellsFargo",
+        "YearEnd",
+        parser="wells_fargo.parser:WellsFargoYearEndSummaryParser",
+        drop=["Unnamed: 8"],
+        rename={"Payment Method": "Card"},
+        card_column="Payment Method",
+        transfers={PAYMENTS: None},
+    )
+)
+# Statements are PDFs, parsed by their own parser rather than from the spec
+register(
+    BankSpec(
+        "WellsFargo",
+        "Statements",
+        parser="wells_fargo.parser:WellsFargoParser",
+    )
+)
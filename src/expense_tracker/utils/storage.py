@@ -0,0 +1,764 @@
+import os
+import secrets
+import shutil
+import sqlite3
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, Literal
+
+import pandas as pd
+
+from expense_tracker.utils.locks import file_lock
+from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils.schema import CATEGORICAL_COLUMNS, apply_schema
+from expense_tracker.utils.transforms import to_cents, to_dollars
+
+if TYPE_CHECKING:
+    from expense_tracker.query import Query
+
+
+def encode_amounts(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the int64 cents of the Amount column to dollars for a text file.
+    Dollars are written with at most two decimals ("12.34"), so the files
+    stay readable and read back to the exact same cents.
+    """
+    if "Amount" not in df.columns:
+        return df
+    return df.assign(Amount=to_dollars(df["Amount"]))
+
+
+def decode_amounts(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the dollars of the Amount column read from a text file to cents.
+    """
+    if "Amount" in df.columns:
+        df["Amount"] = to_cents(df["Amount"])
+    return df
+
+
+def file_mode(path: Path) -> int:
+    """
+    Permissions for a file replacing path: those of the existing file, or
+    the usual ones of a new file (0666 minus the umask). Temporary files are
+    created as 0600 and keep that mode when renamed over the destination.
+    """
+    try:
+        return path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def atomic_to_csv(df: pd.DataFrame, path: Path, **kwargs):
+    """
+    Write a DataFrame to a CSV/TSV file atomically.
+    The data is written to a temporary file in the same directory and then
+    renamed over the destination, so readers never see a half-written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        os.fchmod(fd, file_mode(path))
+        with os.fdopen(fd, "w", newline="") as f:
+            df.to_csv(f, **kwargs)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class Storage(ABC):
+    """
+    Storage backend for the bank and global aggregates.
+    A dataset is identified by its path without extension,
+    e.g. data/WellsFargo/aggregate or data/global_aggregate.
+    Amounts are read and written as int64 cents, whatever the file holds,
+    and datasets are read with the compact dtypes of utils.schema.
+    """
+
+    suffix: str = ""
+    # Whether upsert() writes only the given rows instead of the whole dataset
+    incremental: bool = False
+    # Whether append() adds rows to the end of a dataset in place instead of
+    # rewriting it
+    appendable: bool = False
+
+    def location(self, dataset: Path) -> Path:
+        """
+        Get the file or directory that holds a dataset.
+        """
+        return dataset.with_suffix(self.suffix)
+
+    def exists(self, dataset: Path) -> bool:
+        """
+        Check whether a dataset has been written.
+        """
+        return self.location(dataset).exists()
+
+    def lock(self, dataset: Path):
+        """
+        Lock a dataset against other writers, in this or other processes,
+        for a read-modify-write such as merging new rows into it.
+        Readers need no lock, every write replaces a dataset atomically.
+        """
+        return file_lock(dataset.with_suffix(".lock"))
+
+    def version(self, dataset: Path) -> str | None:
+        """
+        Get a token that changes whenever a dataset is rewritten,
+        e.g. to key caches derived from it. None if it does not exist.
+        """
+        location = self.location(dataset)
+        if not location.exists():
+            return None
+        stat = location.stat()
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def modified(self, dataset: Path) -> datetime | None:
+        """
+        Get the time a dataset was last rewritten. None if it does not exist.
+        """
+        location = self.location(dataset)
+        if not location.exists():
+            return None
+        return datetime.fromtimestamp(location.stat().st_mtime)
+
+    @abstractmethod
+    def read(self, dataset: Path, columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Read a dataset, optionally only the given columns.
+        Columns that are not in the dataset are ignored.
+        An empty DataFrame is returned if the dataset does not exist.
+        """
+        pass
+
+    @abstractmethod
+    def write(self, dataset: Path, df: pd.DataFrame):
+        """
+        Atomically replace a dataset with the given DataFrame.
+        """
+        pass
+
+    def select(
+        self, dataset: Path, query: "Query", columns: list[str] | None = None
+    ) -> pd.DataFrame:
+        """
+        Read the rows of a dataset that pass a query's filters, optionally
+        only the given columns, sorted by Date and Description.
+        Backends push the filters down to skip what they can, by default
+        only the columns the query and the caller need are read.
+        """
+        names = None if columns is None else [*columns, *query.columns]
+        df = query.apply(self.read(dataset, columns=names))
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        return df
+
+    def read_chunks(self, dataset: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+        """
+        Read a dataset in chunks of rows, in its stored (sorted) order.
+        Backends that cannot stream yield the whole dataset at once.
+        """
+        if self.exists(dataset):
+            yield self.read(dataset)
+
+    def write_chunks(self, dataset: Path, chunks: Iterable[pd.DataFrame]):
+        """
+        Atomically replace a dataset with a stream of chunks.
+        Backends that cannot stream collect the chunks and write them at once.
+        """
+        chunks = list(chunks)
+        self.write(dataset, pd.concat(chunks) if chunks else pd.DataFrame())
+
+    def upsert(self, dataset: Path, df: pd.DataFrame):
+        """
+        Insert new rows and update existing ones, matched on the ID column,
+        keeping the dataset sorted by Date and Description. Incremental
+        backends write only the given rows, by default the whole dataset is
+        rewritten.
+        """
+        data = pd.concat([self.read(dataset), df], ignore_index=True)
+        data.drop_duplicates(subset=["ID"], keep="last", inplace=True)
+        data.sort_values(by=["Date", "Description"], inplace=True)
+        self.write(dataset, data)
+
+    def insert(self, dataset: Path, df: pd.DataFrame):
+        """
+        Add rows that are not in a dataset yet, keeping it sorted by Date
+        and Description. Rows whose ID is already in the dataset are
+        dropped. Backends rewrite as little of the dataset as they can,
+        by default all of it.
+        """
+        data = pd.concat([self.read(dataset), df], ignore_index=True)
+        data.drop_duplicates(subset=["ID"], inplace=True)
+        data.sort_values(by=["Date", "Description"], inplace=True)
+        self.write(dataset, data)
+
+    def append(self, dataset: Path, df: pd.DataFrame):
+        """
+        Add rows to the end of an existing dataset.
+        Raises ValueError if the rows have columns the dataset does not have.
+        Appendable backends write the rows in place, by default the whole
+        dataset is rewritten.
+        """
+        data = self.read(dataset)
+        extra = [col for col in df.columns if col not in data.columns]
+        if extra:
+            raise ValueError(f"{self.location(dataset).name} has no columns {extra}")
+        df = df.reindex(columns=data.columns)
+        self.write(dataset, pd.concat([data, df], ignore_index=True))
+
+
+class TSVStorage(Storage):
+    """
+    Tab-separated text files, one per dataset. Writes replace the file with
+    a rename, so readers keep the complete version they opened. Appends
+    write in place, so they exclude readers with a lock for their duration.
+    """
+
+    suffix = ".tsv"
+    appendable = True
+
+    def append_lock(self, dataset: Path, shared: bool = False):
+        """
+        Lock held exclusively while appending and shared while reading.
+        """
+        file = self.location(dataset)
+        return file_lock(file.with_name(f".{file.name}.lock"), shared=shared)
+
+    def read(self, dataset: Path, columns: list[str] | None = None) -> pd.DataFrame:
+        file = self.location(dataset)
+        if not file.exists():
+            return pd.DataFrame()
+        usecols = (lambda col: col in columns) if columns is not None else None
+        parse_dates = ["Date"] if columns is None or "Date" in columns else False
+        with self.append_lock(dataset, shared=True):
+            df = pd.read_csv(file, sep="\t", usecols=usecols, parse_dates=parse_dates)
+        return apply_schema(decode_amounts(df))
+
+    def write(self, dataset: Path, df: pd.DataFrame):
+        atomic_to_csv(encode_amounts(df), self.location(dataset), sep="\t", index=False)
+
+    def append(self, dataset: Path, df: pd.DataFrame):
+        file = self.location(dataset)
+        columns = pd.read_csv(file, sep="\t", nrows=0).columns
+        extra = [col for col in df.columns if col not in columns]
+        if extra:
+            raise ValueError(f"{file.name} has no columns {extra}")
+        text = encode_amounts(df.reindex(columns=columns)).to_csv(
+            sep="\t", index=False, header=False
+        )
+        with self.append_lock(dataset), open(file, "a", newline="") as f:
+            size = f.tell()
+            try:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                # Never leave a partially written row behind
+                f.truncate(size)
+                raise
+
+    def read_chunks(self, dataset: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+        file = self.location(dataset)
+        if file.exists():
+            with self.append_lock(dataset, shared=True):
+                for chunk in pd.read_csv(
+                    file, sep="\t", parse_dates=["Date"], chunksize=chunksize
+                ):
+                    yield apply_schema(decode_amounts(chunk))
+
+    def write_chunks(self, dataset: Path, chunks: Iterable[pd.DataFrame]):
+        file = self.location(dataset)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            dir=file.parent, prefix=f".{file.name}.", suffix=".tmp"
+        )
+        try:
+            os.fchmod(fd, file_mode(file))
+            with os.fdopen(fd, "w", newline="") as f:
+                header = True
+                for chunk in chunks:
+                    encode_amounts(chunk).to_csv(
+                        f, sep="\t", index=False, header=header
+                    )
+                    header = False
+            os.replace(tmp_name, file)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+
+class ParquetStorage(Storage):
+    """
+    Parquet datasets with typed columns, hive-partitioned by bank and month.
+    Each write goes to a new version directory and the CURRENT pointer file
+    is then swapped atomically, so readers always see a complete snapshot.
+    """
+
+    suffix = ".parquet"
+    partition_cols = ["Bank", "Month"]
+    keep_versions = 2
+
+    def __init__(self):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "The parquet storage backend requires pyarrow. "
+                "Install it with `pip install expense-tracker[parquet]`."
+            ) from e
+
+    def current_version(self, dataset: Path) -> Path | None:
+        """
+        Get the directory of the latest complete version of a dataset.
+        """
+        pointer = self.location(dataset) / "CURRENT"
+        if not pointer.exists():
+            return None
+        return self.location(dataset) / pointer.read_text().strip()
+
+    def exists(self, dataset: Path) -> bool:
+        return self.current_version(dataset) is not None
+
+    def version(self, dataset: Path) -> str | None:
+        version = self.current_version(dataset)
+        return version.name if version is not None else None
+
+    def modified(self, dataset: Path) -> datetime | None:
+        pointer = self.location(dataset) / "CURRENT"
+        if not pointer.exists():
+            return None
+        return datetime.fromtimestamp(pointer.stat().st_mtime)
+
+    def to_arrow(self, df: pd.DataFrame):
+        """
+        Convert a DataFrame to an Arrow table with the typed aggregate schema.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        df = df.copy()
+        df["Month"] = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for i, name in enumerate(table.column_names):
+            column = table.column(i)
+            if name == "Date":
+                column = column.cast(pa.timestamp("ms")).cast(pa.date32())
+            elif name == "Amount":
+                # Exact cents to fixed-point dollars
+                column = pc.multiply(
+                    column.cast(pa.decimal128(19, 0)),
+                    pa.scalar(Decimal("0.01"), pa.decimal128(3, 2)),
+                ).cast(pa.decimal128(12, 2))
+            elif name in CATEGORICAL_COLUMNS and name not in self.partition_cols:
+                # Columns without any value, e.g. Type, have no value type
+                if pa.types.is_null(getattr(column.type, "value_type", column.type)):
+                    column = pa.nulls(len(column), pa.string())
+                column = pc.dictionary_encode(column)
+            else:
+                continue
+            table = table.set_column(i, name, column)
+        return table
+
+    def from_arrow(self, table) -> pd.DataFrame:
+        """
+        Convert an Arrow table read from a dataset back to a DataFrame
+        with the canonical schema.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if "Amount" in table.column_names:
+            i = table.column_names.index("Amount")
+            cents = pc.multiply(
+                table.column(i), pa.scalar(Decimal(100), pa.decimal128(3, 0))
+            )
+            table = table.set_column(i, "Amount", cents.cast(pa.int64()))
+        return apply_schema(table.to_pandas(date_as_object=False))
+
+    def read(self, dataset: Path, columns: list[str] | None = None) -> pd.DataFrame:
+        import pyarrow.dataset as ds
+
+        version = self.current_version(dataset)
+        if version is None:
+            return pd.DataFrame()
+        data = ds.dataset(
+            version,
+            format="parquet",
+            partitioning="hive",
+        )
+        names = [name for name in data.schema.names if name != "Month"]
+        if columns is not None:
+            names = [name for name in names if name in columns]
+        return self.from_arrow(data.to_table(columns=names))
+
+    def select(
+        self, dataset: Path, query: "Query", columns: list[str] | None = None
+    ) -> pd.DataFrame:
+        """
+        The filters are pushed down to the dataset scan: bank and month
+        partitions outside of them are not opened, and row groups are
+        skipped with their statistics.
+        """
+        import pyarrow.dataset as ds
+
+        version = self.current_version(dataset)
+        if version is None:
+            return pd.DataFrame()
+        data = ds.dataset(version, format="parquet", partitioning="hive")
+        names = [name for name in data.schema.names if name != "Month"]
+        if columns is not None:
+            # The scan is in partition order, it is sorted after filtering
+            wanted = [*columns, *query.columns, "Date", "Description"]
+            names = [name for name in names if name in wanted]
+        table = data.to_table(
+            columns=names, filter=query.arrow(partitions=data.partitioning.schema.names)
+        )
+        df = query.apply(self.from_arrow(table))
+        df = df.sort_values(by=["Date", "Description"], ignore_index=True)
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        return df
+
+    def write(self, dataset: Path, df: pd.DataFrame):
+        import pyarrow.dataset as ds
+
+        root = self.location(dataset)
+        root.mkdir(parents=True, exist_ok=True)
+        version = Path(tempfile.mkdtemp(dir=root, prefix="v"))
+        try:
+            table = self.to_arrow(df)
+            ds.write_dataset(
+                table,
+                version,
+                format="parquet",
+                partitioning=[
+                    col for col in self.partition_cols if col in table.column_names
+                ],
+                partitioning_flavor="hive",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            self.publish(dataset, version)
+        except BaseException:
+            shutil.rmtree(version, ignore_errors=True)
+            raise
+
+    def insert(self, dataset: Path, df: pd.DataFrame):
+        """
+        Only the (Bank, Month) partitions the new rows fall in are rewritten.
+        The files of the other partitions are hard-linked into the new
+        version, so the cost grows with the new rows' months, not with the
+        dataset. New files keep the column types of the existing ones;
+        rows with columns the dataset does not have rewrite it all.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        current = self.current_version(dataset)
+        if current is None or df.empty:
+            return super().insert(dataset, df)
+        existing = ds.dataset(current, format="parquet", partitioning="hive")
+        if not set(df.columns) <= set(existing.schema.names):
+            return super().insert(dataset, df)
+        file_schema = [
+            field for field in existing.schema if field.name not in self.partition_cols
+        ]
+        months = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m")
+        touched = set(zip(df["Bank"].astype(str), months))
+        root = self.location(dataset)
+        version = Path(tempfile.mkdtemp(dir=root, prefix="v"))
+        try:
+            rewritten = []
+            for fragment in existing.get_fragments():
+                keys = ds.get_partition_keys(fragment.partition_expression)
+                if (str(keys.get("Bank")), str(keys.get("Month"))) in touched:
+                    rewritten.append(fragment.path)
+                    continue
+                target = version / Path(fragment.path).relative_to(current)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(fragment.path, target)
+                except OSError:
+                    shutil.copy2(fragment.path, target)
+            old = (
+                self.from_arrow(
+                    ds.dataset(
+                        rewritten,
+                        format="parquet",
+                        partitioning="hive",
+                        partition_base_dir=str(current),
+                    )
+                    .to_table()
+                    .drop_columns(["Month"])
+                )
+                if rewritten
+                else pd.DataFrame()
+            )
+            data = pd.concat([old, df], ignore_index=True)
+            data.drop_duplicates(subset=["ID"], inplace=True)
+            data.sort_values(by=["Date", "Description"], inplace=True)
+            table = self.to_arrow(data)
+            columns = [
+                (
+                    table.column(field.name).cast(field.type)
+                    if field.name in table.column_names
+                    else pa.nulls(len(table), field.type)
+                )
+                for field in file_schema
+            ]
+            columns += [table.column(col) for col in self.partition_cols]
+            file_schema += [table.schema.field(col) for col in self.partition_cols]
+            ds.write_dataset(
+                pa.Table.from_arrays(columns, schema=pa.schema(file_schema)),
+                version,
+                format="parquet",
+                partitioning=self.partition_cols,
+                partitioning_flavor="hive",
+                basename_template=f"{version.name}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            self.publish(dataset, version)
+        except BaseException:
+            shutil.rmtree(version, ignore_errors=True)
+            raise
+
+    def publish(self, dataset: Path, version: Path):
+        """
+        Make a complete version directory the current version of a dataset,
+        by swapping the CURRENT pointer atomically, and drop old versions.
+        """
+        root = self.location(dataset)
+        pointer = root / "CURRENT.tmp"
+        pointer.write_text(version.name)
+        os.replace(pointer, root / "CURRENT")
+        # Keep a few old versions around for readers still using them
+        old_versions = sorted(
+            (p for p in root.iterdir() if p.is_dir() and p != version),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for old in old_versions[: max(len(old_versions) - self.keep_versions, 0)]:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+class SQLiteStorage(Storage):
+    """
+    SQLite database files, one per dataset, each with a `transactions` table
+    keyed by ID and indexed for date, card and category range queries.
+    New rows are upserted, so appends only touch the rows being added.
+    Amounts are INTEGER cents, so the database sums them exactly.
+    """
+
+    suffix = ".sqlite"
+    incremental = True
+    table = "transactions"
+    core_columns = {
+        "ID": "TEXT PRIMARY KEY",
+        "Date": "TEXT",
+        "Description": "TEXT",
+        "Amount": "INTEGER",
+        "Card": "",
+        "Bank": "TEXT",
+        "Category": "TEXT",
+        "Type": "TEXT",
+    }
+    indexes = {
+        "idx_transactions_date": ["Date"],
+        "idx_transactions_bank_card_date": ["Bank", "Card", "Date"],
+        "idx_transactions_category_date": ["Category", "Date"],
+    }
+
+    @staticmethod
+    def quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def connect(self, dataset: Path) -> sqlite3.Connection:
+        """
+        Open the database of a dataset, creating the table and indexes if needed.
+        """
+        location = self.location(dataset)
+        location.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(location, timeout=30, isolation_level=None)
+        columns = ", ".join(
+            f"{self.quote(name)} {kind}".strip()
+            for name, kind in self.core_columns.items()
+        )
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({columns})")
+        existing = self.table_columns(conn)
+        for name, kind in self.core_columns.items():
+            if name in existing:
+                continue
+            # Tables created before the column was part of the schema
+            try:
+                conn.execute(
+                    f"ALTER TABLE {self.table} ADD COLUMN {self.quote(name)} {kind}"
+                )
+            except sqlite3.OperationalError:
+                # Unless another process just added it
+                if name not in self.table_columns(conn):
+                    raise
+        # Versions of a new database start at random, so a deleted and
+        # recreated dataset does not reuse the versions of sidecar files
+        if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+            conn.execute(f"PRAGMA user_version = {secrets.randbelow(2**30) + 1}")
+        for index, index_columns in self.indexes.items():
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {index} ON {self.table} "
+                f"({', '.join(map(self.quote, index_columns))})"
+            )
+        return conn
+
+    @contextmanager
+    def transaction(self, dataset: Path):
+        """
+        Open the database of a dataset in a write transaction that bumps the
+        data version, so readers see either all of a write or none of it.
+        """
+        with closing(self.connect(dataset)) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                conn.execute(f"PRAGMA user_version = {version + 1}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def table_columns(self, conn: sqlite3.Connection) -> list[str]:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")]
+
+    def version(self, dataset: Path) -> str | None:
+        location = self.location(dataset)
+        if not location.exists():
+            return None
+        with closing(sqlite3.connect(location, timeout=30)) as conn:
+            return str(conn.execute("PRAGMA user_version").fetchone()[0])
+
+    def query(self, dataset: Path, sql: str, params=()) -> pd.DataFrame:
+        """
+        Run a SQL query against the `transactions` table of a dataset.
+        """
+        if not self.exists(dataset):
+            return pd.DataFrame()
+        with closing(self.connect(dataset)) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def read(self, dataset: Path, columns: list[str] | None = None) -> pd.DataFrame:
+        if not self.exists(dataset):
+            return pd.DataFrame()
+        with closing(self.connect(dataset)) as conn:
+            names = self.table_columns(conn)
+            if columns is not None:
+                names = [name for name in names if name in columns]
+            else:
+                # Keep the column order of the file backends, ID last
+                names = [name for name in names if name != "ID"] + ["ID"]
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(map(self.quote, names))} FROM {self.table} "
+                "ORDER BY Date, Description",
+                conn,
+            )
+        return apply_schema(df)
+
+    def select(
+        self, dataset: Path, query: "Query", columns: list[str] | None = None
+    ) -> pd.DataFrame:
+        """
+        The filters become the WHERE clause, which the date, bank/card/date
+        and category/date indexes serve.
+        """
+        if not self.exists(dataset):
+            return pd.DataFrame()
+        where, params = query.sql()
+        with closing(self.connect(dataset)) as conn:
+            names = self.table_columns(conn)
+            if columns is not None:
+                names = [name for name in names if name in [*columns, *query.columns]]
+            else:
+                names = [name for name in names if name != "ID"] + ["ID"]
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(map(self.quote, names))} FROM {self.table} "
+                f"WHERE {where} ORDER BY Date, Description",
+                conn,
+                params=params,
+            )
+        df = query.apply(apply_schema(df))
+        if columns is not None:
+            df = df[[col for col in columns if col in df.columns]]
+        return df
+
+    def upsert_rows(self, conn: sqlite3.Connection, df: pd.DataFrame):
+        """
+        Upsert a DataFrame into the table, adding any new columns first.
+        """
+        if df.empty:
+            return
+        existing = self.table_columns(conn)
+        for name in df.columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {self.table} ADD COLUMN {self.quote(name)}")
+        df = df.copy()
+        if "Date" in df.columns:
+            df["Date"] = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m-%d")
+        df = df.astype(object).where(df.notna(), None)
+        names = ", ".join(map(self.quote, df.columns))
+        placeholders = ", ".join("?" * len(df.columns))
+        updates = ", ".join(
+            f"{self.quote(name)} = excluded.{self.quote(name)}"
+            for name in df.columns
+            if name != "ID"
+        )
+        conn.executemany(
+            f"INSERT INTO {self.table} ({names}) VALUES ({placeholders}) "
+            f"ON CONFLICT(ID) DO UPDATE SET {updates}",
+            df.itertuples(index=False, name=None),
+        )
+
+    def write(self, dataset: Path, df: pd.DataFrame):
+        with self.transaction(dataset) as conn:
+            conn.execute(f"DELETE FROM {self.table}")
+            self.upsert_rows(conn, df)
+
+    def upsert(self, dataset: Path, df: pd.DataFrame):
+        with self.transaction(dataset) as conn:
+            self.upsert_rows(conn, df)
+
+
+STORAGE_BACKENDS: dict[str, type[Storage]] = {
+    "tsv": TSVStorage,
+    "parquet": ParquetStorage,
+    "sqlite": SQLiteStorage,
+}
+
+
+def get_storage(backend: Literal["tsv", "parquet", "sqlite"] | None = None) -> Storage:
+    """
+    Get the storage backend by name.
+    Defaults to the STORAGE_BACKEND environment variable, or "tsv".
+    """
+    backend = backend or os.environ.get("STORAGE_BACKEND") or "tsv"
+    try:
+        return STORAGE_BACKENDS[backend.lower()]()
+    except KeyError:
+        raise ValueError(f"Unsupported storage backend: {backend}")
+
+
+def export_to_tsv(
+    dataset: Path, file: Path | None = None, storage: Storage | None = None
+):
+    """
+    Export a dataset from any storage backend to a TSV file.
+    """
+    storage = storage or get_storage()
+    file = file or dataset.with_suffix(".tsv")
+    atomic_to_csv(encode_amounts(storage.read(dataset)), file, sep="\t", index=False)
+    LOGGER.info(f"Exported {dataset.name} to {file}")
@@ -0,0 +1,154 @@
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+SORT_COLUMNS = ["Date", "Description"]
+# Smallest block read from each run during a merge, to bound per-block overhead
+MIN_BLOCK_ROWS = 1000
+
+
+def align_chunks(chunks: Iterable[pd.DataFrame], column: str) -> Iterator[pd.DataFrame]:
+    """
+    Re-cut a stream of chunks so that rows sharing a date never straddle two
+    chunks. Identical transactions always share a date, so their occurrence
+    counters (and thus their IDs) can be computed one chunk at a time.
+    Assumes the export is ordered by date, as bank exports are.
+    """
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if chunk.empty:
+            carry = chunk
+            continue
+        last = chunk[column] == chunk[column].iloc[-1]
+        carry = chunk[last]
+        if not (~last).any():
+            continue
+        yield chunk[~last]
+    if carry is not None and not carry.empty:
+        yield carry
+
+
+def sort_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(by=SORT_COLUMNS, kind="stable", ignore_index=True)
+
+
+def write_runs(chunks: Iterable[pd.DataFrame], directory: Path) -> list[Path]:
+    """
+    Sort each chunk and spill it to a run file, for an external merge sort.
+    """
+    runs = []
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        run = directory / f"run-{len(runs)}.tsv"
+        sort_chunk(chunk).to_csv(run, sep="\t", index=False)
+        runs.append(run)
+    return runs
+
+
+def read_run(run: Path, blocksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Read a sorted run back in blocks.
+    """
+    yield from pd.read_csv(run, sep="\t", parse_dates=["Date"], chunksize=blocksize)
+
+
+def prefix_length(df: pd.DataFrame, bound: tuple, inclusive: bool = True) -> int:
+    """
+    Count the leading rows of a sorted DataFrame that sort at or before the
+    bound (Date, Description), or strictly before it if not inclusive.
+    Missing descriptions sort last, as in DataFrame.sort_values.
+    """
+    date, description = bound
+    dates = df["Date"].to_numpy()
+    date = pd.Timestamp(date).to_datetime64()
+    if dates[0] > date:
+        return 0
+    lo = int(dates.searchsorted(date, side="left"))
+    hi = int(dates.searchsorted(date, side="right"))
+    same_date = df["Description"].iloc[lo:hi]
+    if pd.isna(description):
+        return hi if inclusive else lo + int(same_date.notna().sum())
+    before = same_date <= description if inclusive else same_date < description
+    return lo + int(before.fillna(False).sum())
+
+
+def sort_key(df: pd.DataFrame) -> tuple:
+    """
+    Sort key of the last row of a sorted DataFrame.
+    """
+    date, description = df["Date"].iloc[-1], df["Description"].iloc[-1]
+    return (date, pd.isna(description), "" if pd.isna(description) else description)
+
+
+def merge_sorted(sources: list[Iterable[pd.DataFrame]]) -> Iterator[pd.DataFrame]:
+    """
+    K-way merge of sorted DataFrame streams into one sorted stream.
+    Only one block per source is held in memory. Each step emits every
+    buffered row that sorts at or before the smallest buffered tail of the
+    sources that still have data, which no later block can precede.
+    Ties keep source order, so earlier sources win deduplication: rows tied
+    with that tail are held back in the sources after the first one whose
+    next block may hold more of them.
+    """
+    iterators = [iter(source) for source in sources]
+    buffers = [pd.DataFrame() for _ in iterators]
+    # Sort key of the last row of each buffer, which slicing does not change
+    tails: list[tuple] = [() for _ in iterators]
+    done = [False for _ in iterators]
+    while True:
+        for i, iterator in enumerate(iterators):
+            while buffers[i].empty and not done[i]:
+                block = next(iterator, None)
+                if block is None:
+                    done[i] = True
+                elif not block.empty:
+                    buffers[i] = block
+                    tails[i] = sort_key(block)
+        live = [i for i, buffer in enumerate(buffers) if not buffer.empty]
+        if not live:
+            return
+        pending = [i for i in live if not done[i]]
+        parts = []
+        if pending:
+            first = min(pending, key=lambda i: tails[i])
+            tail = buffers[first]
+            bound = (tail["Date"].iloc[-1], tail["Description"].iloc[-1])
+            first = min(i for i in pending if tails[i] == tails[first])
+            for i in live:
+                n = prefix_length(buffers[i], bound, inclusive=i <= first)
+                parts.append(buffers[i].iloc[:n])
+                buffers[i] = buffers[i].iloc[n:]
+        else:
+            for i in live:
+                parts.append(buffers[i])
+                buffers[i] = pd.DataFrame()
+        parts = [part for part in parts if not part.empty]
+        if parts:
+            yield sort_chunk(pd.concat(parts, ignore_index=True))
+
+
+def drop_duplicate_ids(blocks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Drop repeated transaction IDs from a date-sorted stream, keeping the first.
+    Rows with the same ID share a date, so only the IDs of the latest date
+    need to be remembered between blocks.
+    """
+    last_date, last_ids = None, set()
+    for block in blocks:
+        block = block[~block["ID"].duplicated()]
+        if last_ids:
+            # The block is sorted, so rows of the previous date come first
+            n = int((block["Date"] == last_date).sum())
+            seen = block["ID"].iloc[:n].isin(last_ids).to_numpy()
+            block = pd.concat([block.iloc[:n][~seen], block.iloc[n:]])
+        if block.empty:
+            continue
+        date = block["Date"].iloc[-1]
+        ids = set(block.loc[block["Date"] == date, "ID"])
+        last_ids = ids | last_ids if date == last_date else ids
+        last_date = date
+        yield block
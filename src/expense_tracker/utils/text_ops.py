@@ -1,11 +1,91 @@
 import random
 import string
 
+import numpy as np
+import pandas as pd
+
+ID_COLUMNS = ["Bank", "Card", "Date", "Amount", "Description"]
+ID_LENGTH = 16
+HEX_DIGITS = np.array(list("0123456789ABCDEF"))
+
 
 def random_id(length=17):
     chars = string.digits + string.ascii_uppercase
     return "".join(random.choices(chars, k=length))
 
 
+def normalize_description(descriptions: pd.Series) -> pd.Series:
+    """
+    Normalize transaction descriptions: uppercase, single spaces, no padding.
+    """
+    return (
+        descriptions.fillna("")
+        .astype(str)
+        .str.upper()
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def transaction_ids(df: pd.DataFrame) -> np.ndarray:
+    """
+    Compute deterministic transaction IDs from the content of each row.
+    The ID is a hash of bank, card, date, amount in cents, normalized
+    description and an occurrence counter that tells apart identical
+    transactions on the same day. Everything is computed over whole columns.
+    """
+    key = pd.DataFrame(
+        {
+            "Bank": df["Bank"].astype(str).to_numpy(dtype=object),
+            "Card": df["Card"].astype(str).to_numpy(dtype=object),
+            "Date": pd.to_datetime(df["Date"])
+            .to_numpy()
+            .astype("datetime64[D]")
+            .astype(np.int64),
+            "Amount": df["Amount"].to_numpy(dtype=np.int64),
+            "Description": normalize_description(df["Description"]).to_numpy(
+                dtype=object
+            ),
+        }
+    )
+    occurrence = key.groupby(ID_COLUMNS, sort=False).cumcount().to_numpy(np.int64)
+    hashes = pd.util.hash_array(occurrence)
+    with np.errstate(over="ignore"):
+        for col in ID_COLUMNS:
+            hashes = hashes * np.uint64(0x100000001B3) ^ pd.util.hash_array(
+                key[col].to_numpy()
+            )
+    # Format each 64-bit hash as 16 hex digits without a per-row Python loop
+    shifts = np.arange(60, -4, -4, dtype=np.uint64)
+    nibbles = (hashes[:, None] >> shifts) & np.uint64(0xF)
+    return np.ascontiguousarray(HEX_DIGITS[nibbles]).view(f"<U{ID_LENGTH}").ravel()
+
+
+def has_legacy_ids(df: pd.DataFrame) -> pd.Series:
+    """
+    Flag rows whose ID was not produced by transaction_ids(),
+    e.g. the random IDs assigned by earlier versions.
+    """
+    ids = df["ID"].astype(str)
+    return (ids.str.len() != ID_LENGTH) | ~ids.str.fullmatch(r"[0-9A-F]+")
+
+
+def upgrade_legacy_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace legacy random IDs with content-hash IDs so that old aggregates
+    can be deduplicated against newly parsed rows.
+    Earlier versions re-added the same rows with new random IDs on every run,
+    so legacy rows are deduplicated on their content first.
+    """
+    if df.empty or not set(ID_COLUMNS + ["ID"]).issubset(df.columns):
+        return df
+    legacy = has_legacy_ids(df)
+    if not legacy.any():
+        return df
+    old = df[legacy].drop_duplicates(subset=ID_COLUMNS).copy()
+    old["ID"] = transaction_ids(old)
+    return pd.concat([df[~legacy], old], ignore_index=True)
+
+
 if __name__ == "__main__":
     print(random_id())
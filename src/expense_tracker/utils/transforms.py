@@ -0,0 +1,115 @@
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+# Lookup tables to format amounts without converting each number in Python:
+# the sign and leading digits, e.g. "$-12", then the thousands groups
+LEADING_DIGITS = np.array([f"{sign}{i}" for sign in ("$", "$-") for i in range(1000)])
+THOUSANDS = np.array([f",{i:03d}" for i in range(1000)])
+CENTS = np.array([f".{i:02d}" for i in range(100)])
+
+
+def by_unique(
+    values: pd.Series, transform: Callable[[pd.Series], np.ndarray], missing
+) -> np.ndarray:
+    """
+    Run a column transform on the distinct values only and broadcast the
+    result back, since statement columns repeat a lot (card names, blank
+    credits, recurring amounts). Missing values get the missing result.
+    """
+    codes, uniques = pd.factorize(values)
+    result = np.asarray(transform(pd.Series(uniques, dtype=object)))
+    return np.append(result, np.array([missing], dtype=result.dtype))[codes]
+
+
+def parse_amounts(values: pd.Series) -> pd.Series:
+    """
+    Parse amounts extracted as text, e.g. "1,234.56" or "$12.00",
+    into floats. Blank and missing amounts are 0.0.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(np.float64).fillna(0.0)
+    try:
+        # Plain numbers, most amounts, are parsed in numpy's C loop
+        dollars = values.to_numpy(dtype=object).astype(np.float64)
+        if not np.isnan(dollars).any():
+            return pd.Series(dollars, index=values.index)
+    except (TypeError, ValueError):
+        pass
+
+    def parse(uniques: pd.Series) -> np.ndarray:
+        # float() is as fast as pandas' string ops per value, and skips them
+        return np.fromiter(
+            (
+                float(str(text).strip().replace(",", "").replace("$", "") or 0)
+                for text in uniques
+            ),
+            dtype=np.float64,
+            count=len(uniques),
+        )
+
+    return pd.Series(by_unique(values, parse, 0.0), index=values.index)
+
+
+def last_digits(values: pd.Series, digits: int = 4) -> pd.Series:
+    """
+    Get the number formed by the last digits of each value, e.g. the card
+    number of "Quicksilver ...1234". Values that do not end with that many
+    digits after some other text are 0.
+    """
+
+    def extract(uniques: pd.Series) -> np.ndarray:
+        text = uniques.astype(str).str.strip()
+        last = text.str[-digits:]
+        valid = (text.str.len() > digits) & last.str.isdigit()
+        return last.where(valid, "0").astype(np.int64).to_numpy()
+
+    return pd.Series(by_unique(values, extract, 0), index=values.index)
+
+
+def to_cents(values: pd.Series) -> pd.Series:
+    """
+    Convert dollar amounts, as numbers or text, to int64 cents, the exact
+    amount type of the aggregates. Missing amounts are 0.
+    """
+    dollars = parse_amounts(values).to_numpy(dtype=np.float64)
+    return pd.Series(np.rint(dollars * 100).astype(np.int64), index=values.index)
+
+
+def to_dollars(values: pd.Series) -> pd.Series:
+    """
+    Convert amounts in cents to float dollars, e.g. for charts.
+    """
+    return values.astype(np.float64) / 100
+
+
+def format_currency(values: pd.Series) -> pd.Series:
+    """
+    Format amounts in cents as dollars with thousands separators, e.g.
+    "$1,234.50" and "$-12.00", from lookup tables of digit groups. Missing
+    amounts are formatted as empty strings.
+    """
+    amounts = pd.to_numeric(values, errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+    valid = np.isfinite(amounts)
+    cents = np.rint(np.abs(np.where(valid, amounts, 0))).astype(np.int64)
+    dollars, cents = np.divmod(cents, 100)
+    # Number of thousands groups after the leading digits of each amount
+    groups = np.zeros(len(dollars), dtype=np.int64)
+    scale = 1000
+    while (more := dollars >= scale).any():
+        groups += more
+        scale *= 1000
+    text = LEADING_DIGITS[(amounts < 0) * 1000 + dollars // 1000**groups]
+    # Only the amounts of $1,000 or more have thousands groups
+    for group in range(int(groups.max(initial=0)) - 1, -1, -1):
+        rows = np.flatnonzero(groups > group)
+        thousands = THOUSANDS[dollars[rows] // 1000**group % 1000]
+        grouped = np.strings.add(text[rows], thousands)
+        text = text.astype(grouped.dtype)
+        text[rows] = grouped
+    text = np.strings.add(text, CENTS[cents]).astype(object)
+    text[~valid] = ""
+    return pd.Series(text, index=values.index, dtype=object)
@@ -0,0 +1,136 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from expense_tracker.utils.logger import LOGGER
+from expense_tracker.utils.storage import Storage
+
+
+class Watermarks:
+    """
+    Per-card high-water marks of an aggregate, persisted next to it:
+    the latest date of each card and the IDs seen on that date, plus the
+    sort key (Date, Description) of the aggregate's last row.
+    They let parsers drop rows already ingested on those dates, and tell
+    whether new rows can be appended to the aggregate in place, without
+    reading it.
+    The marks are tied to the aggregate's storage version and rebuilt from
+    the aggregate if it was written by something else.
+    """
+
+    def __init__(self, watermark_file: Path):
+        self.watermark_file = watermark_file
+        self.version: str | None = None
+        self.tail: tuple[pd.Timestamp, str] | None = None
+        self.cards: dict[str, tuple[pd.Timestamp, set[str]]] = {}
+
+    @classmethod
+    def load(cls, storage: Storage, dataset: Path) -> "Watermarks":
+        """
+        Load the watermarks of a dataset, rebuilding them if they are
+        missing or out of date.
+        """
+        watermarks = cls(dataset.with_suffix(".watermark.json"))
+        version = storage.version(dataset)
+        if version is None:
+            return watermarks
+        if watermarks.watermark_file.exists():
+            try:
+                with open(watermarks.watermark_file) as f:
+                    data = json.load(f)
+                if data["version"] == version:
+                    watermarks.version = version
+                    if data["tail"] is not None:
+                        date, description = data["tail"]
+                        watermarks.tail = (pd.Timestamp(date), description)
+                    watermarks.cards = {
+                        card: (pd.Timestamp(mark["date"]), set(mark["ids"]))
+                        for card, mark in data["cards"].items()
+                    }
+                    return watermarks
+            except (OSError, KeyError, ValueError):
+                LOGGER.warning(f"Could not read {watermarks.watermark_file}.")
+        LOGGER.debug(f"Rebuilding watermarks of {dataset.name}")
+        watermarks.update(
+            storage.read(dataset, columns=["Card", "Date", "Description", "ID"])
+        )
+        watermarks.save(version)
+        return watermarks
+
+    def update(self, df: pd.DataFrame):
+        """
+        Advance the watermarks with rows written to the aggregate.
+        """
+        if df.empty:
+            return
+        df = df.assign(Card=df["Card"].astype(str), Date=pd.to_datetime(df["Date"]))
+        last = df.sort_values(by=["Date", "Description"]).iloc[-1]
+        tail = (last["Date"], last["Description"])
+        if (
+            self.tail is None
+            or tail[0] > self.tail[0]
+            or (tail[0] == self.tail[0] and str(tail[1]) > str(self.tail[1]))
+        ):
+            self.tail = tail
+        latest = df[df["Date"] == df.groupby("Card")["Date"].transform("max")]
+        for card, rows in latest.groupby("Card"):
+            date = rows["Date"].iloc[0]
+            current = self.cards.get(card)
+            if current is None or date > current[0]:
+                self.cards[card] = (date, set(rows["ID"]))
+            elif date == current[0]:
+                current[1].update(rows["ID"])
+
+    def seen(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Flag rows already in the aggregate according to the watermarks, i.e.
+        rows whose ID was seen on the latest date of their card. Older rows
+        are not flagged, as IDs are deterministic they are deduplicated when
+        merged into the aggregate (e.g. a backfilled statement).
+        """
+        if not self.cards or df.empty:
+            return pd.Series(False, index=df.index)
+        cards = df["Card"].astype(str)
+        known = pd.Series(False, index=df.index)
+        for card in cards.unique():
+            if card in self.cards:
+                known |= (cards == card) & df["ID"].isin(self.cards[card][1])
+        return known
+
+    def sorts_after(self, df: pd.DataFrame) -> bool:
+        """
+        Check whether rows sorted by Date and Description all sort at or after
+        the last row of the aggregate, so they can be appended in place.
+        """
+        if self.tail is None or df.empty:
+            return False
+        date = pd.Timestamp(df["Date"].iloc[0])
+        description = df["Description"].iloc[0]
+        return date > self.tail[0] or (
+            date == self.tail[0] and str(description) >= str(self.tail[1])
+        )
+
+    def save(self, version: str | None):
+        """
+        Save the watermarks for the given version of the aggregate.
+        """
+        self.version = version
+        data = {
+            "version": version,
+            "tail": (
+                [self.tail[0].strftime("%Y-%m-%d"), self.tail[1]]
+                if self.tail is not None
+                else None
+            ),
+            "cards": {
+                card: {"date": date.strftime("%Y-%m-%d"), "ids": sorted(ids)}
+                for card, (date, ids) in self.cards.items()
+            },
+        }
+        self.watermark_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.watermark_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(data, f, indent=2, default=str)
+        tmp_file.replace(self.watermark_file)
+        LOGGER.debug(f"Watermarks saved to {self.watermark_file}")
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from synthetic import generate
+
+from expense_tracker.utils import metrics, parser
+from expense_tracker.utils.schema import apply_schema
+from expense_tracker.utils.storage import get_storage
+from expense_tracker.utils.text_ops import transaction_ids
+
+BACKENDS = ["tsv", "parquet", "sqlite"]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch) -> str:
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+    monkeypatch.setenv("STORAGE_BACKEND", request.param)
+    return request.param
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    Factory of synthetic workspaces under tmp_path: configs/ and data/ with
+    the exports of every bank. Ingestion runs in the workspace made last.
+    """
+    monkeypatch.setenv("INGEST_WORKERS", "1")
+    monkeypatch.setenv("INGEST_PROFILE", "")
+    monkeypatch.setenv("STREAM_CHUNK_ROWS", "0")
+
+    def use(root: Path):
+        monkeypatch.chdir(root)
+        # Paths resolved against the working directory at import time
+        monkeypatch.setattr(parser, "data_path", root / "data")
+        monkeypatch.setattr(metrics, "reports_path", root / "data" / ".reports")
+
+    def make(name: str, rows: int = 600, files: int = 4) -> Path:
+        root = tmp_path / name
+        generate(root, rows, files)
+        use(root)
+        return root
+
+    return make
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    """
+    A small global aggregate: a few purchases of each bank, with repeated
+    merchants, a description with accents and a row without a category.
+    """
+    rows = [
+        ("2025-01-03", "WHOLE FOODS MARKET #12", "Groceries", 4520, 9088, "Chase"),
+        ("2025-01-03", "AMAZON MKTPL*AB12", "Shopping", 1999, 9088, "Chase"),
+        ("2025-01-10", "Café Du Monde", "Dining", 850, 1234, "CapitalOne"),
+        ("2025-02-01", "WHOLE FOODS MKT #7", "Groceries", 12000, 1234, "CapitalOne"),
+        ("2025-02-14", "AMAZON.COM", None, 3500, 9992, "WellsFargo"),
+        ("2025-03-02", "SHELL OIL 5744", "Gas", 6010, 9992, "WellsFargo"),
+        ("2025-03-02", "SHELL OIL 5744", "Gas", 6010, 9992, "WellsFargo"),
+    ]
+    df = pd.DataFrame(
+        rows, columns=["Date", "Description", "Category", "Amount", "Card", "Bank"]
+    )
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["ID"] = transaction_ids(df)
+    return apply_schema(df)
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch, backend, transactions) -> Path:
+    """
+    The small global aggregate, written with each storage backend to
+    data/global_aggregate under tmp_path, the working directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    dataset = Path("data") / "global_aggregate"
+    get_storage().write(dataset, transactions)
+    return dataset
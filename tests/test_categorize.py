@@ -0,0 +1,71 @@
+import json
+import os
+import re
+
+import pandas as pd
+import pytest
+
+from expense_tracker.utils.categorize import Categorizer, get_categorizer
+
+RULES = {
+    "Groceries": ["whole foods", "re:TRADER JOE'?S"],
+    "Shopping": ["amazon", "target"],
+    "Dining": ["starbucks", "re:^TST\\*"],
+}
+
+
+def test_rules_match_normalized_descriptions():
+    categorizer = Categorizer(RULES)
+    descriptions = pd.Series(
+        [
+            "Whole  Foods Market #12",
+            "TRADER JOES #552",
+            "TST* LOCAL CAFE",
+            "CAFE TST* LOCAL",
+            "UNKNOWN MERCHANT",
+            None,
+        ],
+        index=range(5, 11),
+    )
+    categories = categorizer.classify(descriptions)
+    assert categories.tolist() == [
+        "Groceries",
+        "Groceries",
+        "Dining",
+        None,
+        None,
+        None,
+    ]
+    assert categories.index.equals(descriptions.index)
+
+
+def test_leftmost_match_wins_then_first_rule():
+    categorizer = Categorizer(RULES)
+    descriptions = pd.Series(["TARGET STARBUCKS", "STARBUCKS AT TARGET"])
+    assert categorizer.classify(descriptions).tolist() == ["Shopping", "Dining"]
+    tie = Categorizer({"Subscriptions": ["amazon prime"], "Shopping": ["amazon"]})
+    assert tie.classify(pd.Series(["AMAZON PRIME*2X"])).tolist() == ["Subscriptions"]
+
+
+def test_results_are_cached():
+    categorizer = Categorizer(RULES)
+    categorizer.classify(pd.Series(["AMAZON MKTPL", "amazon mktpl"]))
+    assert categorizer.cache == {"AMAZON MKTPL": "Shopping"}
+    assert Categorizer({}).classify(pd.Series(["AMAZON"])).tolist() == [None]
+
+
+def test_invalid_regex_fails_early():
+    with pytest.raises(re.error):
+        Categorizer({"Broken": ["re:(unclosed"]})
+
+
+def test_rules_file_is_reloaded_when_it_changes(tmp_path):
+    file = tmp_path / "categories.json"
+    assert get_categorizer(file) is None
+    file.write_text(json.dumps({"Shopping": ["amazon"]}))
+    categorizer = get_categorizer(file)
+    assert get_categorizer(file) is categorizer
+    file.write_text(json.dumps({"Books": ["amazon"]}))
+    os.utime(file, (1, 1))
+    reloaded = get_categorizer(file)
+    assert reloaded.classify(pd.Series(["AMAZON"])).tolist() == ["Books"]
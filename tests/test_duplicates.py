@@ -0,0 +1,51 @@
+import pandas as pd
+
+from expense_tracker.utils import duplicates, metrics
+from expense_tracker.utils.duplicates import DuplicateDetector
+
+
+def frame(rows: list[tuple]) -> pd.DataFrame:
+    """
+    Transactions from (date, description, amount, card, bank) tuples.
+    """
+    df = pd.DataFrame(rows, columns=["Date", "Description", "Amount", "Card", "Bank"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["ID"] = [f"id{i}" for i in range(len(df))]
+    return df
+
+
+def test_transfer_pairs_are_reported():
+    df = frame(
+        [
+            ("2025-03-01", "CHASE CREDIT CRD AUTOPAY", 25000, 5772, "WellsFargo"),
+            ("2025-03-02", "Payment Thank You-Mobile", -25000, 9088, "Chase"),
+            ("2025-03-02", "SAFEWAY #1234", 4210, 9992, "WellsFargo"),
+        ]
+    )
+    pairs = DuplicateDetector().find(df)
+    assert pairs[["Kind", "ID_a", "ID_b", "Days"]].values.tolist() == [
+        ["transfer", "id0", "id1", 1]
+    ]
+
+
+def test_store_numbers_tell_purchases_apart():
+    df = frame(
+        [
+            ("2025-03-01", "KROGER #106", 4210, 9992, "WellsFargo"),
+            ("2025-03-01", "KROGER #3443", 4210, 9992, "WellsFargo"),
+            ("2025-03-05", "STARBUCKS STORE 4521", 575, 9088, "Chase"),
+            ("2025-03-06", "STARBUCKS STORE #4521 SEATTLE", 575, 9088, "Chase"),
+        ]
+    )
+    pairs = DuplicateDetector().find(df)
+    assert pairs[["Kind", "ID_a", "ID_b"]].values.tolist() == [
+        ["duplicate", "id2", "id3"]
+    ]
+
+
+def test_report_follows_the_reports_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "reports_path", tmp_path / "reports")
+    pairs = DuplicateDetector().find(frame([]))
+    file = duplicates.save_report(pairs)
+    assert file == tmp_path / "reports" / "duplicates.tsv"
+    assert file.exists()
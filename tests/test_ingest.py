@@ -0,0 +1,117 @@
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from expense_tracker import main
+from expense_tracker.utils.metrics import METRICS
+from expense_tracker.utils.storage import get_storage
+
+DATASETS = [
+    "global_aggregate",
+    "Chase/aggregate",
+    "CapitalOne/aggregate",
+    "WellsFargo/aggregate",
+]
+COLUMNS = ["ID", "Date", "Description", "Category", "Amount", "Card", "Bank"]
+
+
+def ingest(chunk_rows: int = 0):
+    """
+    Ingest the new files of the current workspace, streamed in chunks of
+    chunk_rows rows if given.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("STREAM_CHUNK_ROWS", str(chunk_rows))
+        main.fetch_data(1)
+
+
+def aggregates() -> dict[str, pd.DataFrame]:
+    """
+    Read the aggregates of the current workspace as plain values in ID
+    order, so the aggregates of two ingests can be compared.
+    """
+    storage = get_storage()
+    datasets = {}
+    for dataset in DATASETS:
+        df = storage.read(Path("data") / dataset).reindex(columns=COLUMNS)
+        datasets[dataset] = df.astype(str).sort_values(by="ID", ignore_index=True)
+    return datasets
+
+
+def assert_same(actual: dict[str, pd.DataFrame], expected: dict[str, pd.DataFrame]):
+    for dataset, df in expected.items():
+        assert not df.empty
+        assert df["ID"].is_unique
+        pd.testing.assert_frame_equal(actual[dataset], df, obj=dataset)
+
+
+def hold_back(root: Path, pick) -> list[tuple[Path, Path]]:
+    """
+    Move one export of each bank, chosen by pick from its sorted exports,
+    out of the data/ tree. Returns the (held, original) paths.
+    """
+    held = root / "held"
+    held.mkdir()
+    moves = []
+    for directory in sorted((root / "data").glob("*/AccountActivity")):
+        file = pick(sorted(f for f in directory.iterdir() if f.is_file()))
+        target = held / f"{directory.parent.name}-{file.name}"
+        shutil.move(file, target)
+        moves.append((target, file))
+    return moves
+
+
+def test_streamed_ingest_matches_whole_files(workspace, backend):
+    workspace("whole")
+    ingest()
+    expected = aggregates()
+    workspace("streamed")
+    # Several chunks, and sorted runs, per export
+    ingest(chunk_rows=40)
+    assert_same(aggregates(), expected)
+
+
+@pytest.mark.parametrize(
+    "pick",
+    [lambda files: files[-1], lambda files: files[0]],
+    ids=["newer-export", "older-export"],
+)
+def test_incremental_ingest_matches_from_scratch(workspace, backend, pick):
+    workspace("scratch")
+    ingest()
+    expected = aggregates()
+    root = workspace("incremental")
+    moves = hold_back(root, pick)
+    ingest()
+    for held, file in moves:
+        shutil.move(held, file)
+    ingest()
+    assert_same(aggregates(), expected)
+
+
+def test_incremental_ingest_inserts_the_bank_delta(workspace):
+    root = workspace("delta")
+    moves = hold_back(root, lambda files: files[-1])
+    ingest()
+    for held, file in moves:
+        shutil.move(held, file)
+    ingest()
+    for bank in ["Chase", "CapitalOne", "WellsFargo"]:
+        counters = METRICS.stages[f"{bank}/AccountActivity/save_to_global_aggregate"]
+        assert counters["rewrites"] == 0
+        assert counters["appends"] + counters["inserts"] == 1
+
+
+def test_deleted_global_aggregate_is_rebuilt(workspace, backend):
+    workspace("rebuilt")
+    ingest()
+    expected = aggregates()
+    location = get_storage().location(Path("data") / "global_aggregate")
+    if location.is_dir():
+        shutil.rmtree(location)
+    else:
+        location.unlink()
+    ingest()
+    assert_same(aggregates(), expected)
@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+
+import pytest
+
+from expense_tracker.utils.locks import coalesced, file_lock
+
+# Nothing is locked without fcntl (Windows)
+fcntl = pytest.importorskip("fcntl")
+
+
+def try_lock(path, shared: bool = False) -> bool:
+    """
+    Whether another open file of the lock could take it right now.
+    """
+    fd = os.open(path, os.O_RDWR)
+    try:
+        mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        fcntl.flock(fd, mode | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+    finally:
+        os.close(fd)
+
+
+def test_exclusive_and_shared_locks(tmp_path):
+    path = tmp_path / "locks" / "data.lock"
+    with file_lock(path):
+        assert not try_lock(path, shared=True)
+    assert try_lock(path)
+    with file_lock(path, shared=True):
+        assert try_lock(path, shared=True)
+        assert not try_lock(path)
+
+
+def test_locks_are_reentrant(tmp_path):
+    path = tmp_path / "data.lock"
+    with file_lock(path) as fd:
+        with file_lock(path) as nested:
+            assert nested == fd
+        # Leaving the nested lock keeps the outer one
+        assert not try_lock(path)
+    assert try_lock(path)
+
+
+def test_locks_are_released_on_errors(tmp_path):
+    path = tmp_path / "data.lock"
+    with pytest.raises(RuntimeError):
+        with file_lock(path):
+            raise RuntimeError
+    assert try_lock(path)
+
+
+def test_concurrent_requests_are_coalesced(tmp_path):
+    path = tmp_path / "job.lock"
+    runs = []
+    release = threading.Event()
+
+    def request(name: str, hold: bool = False):
+        with coalesced(path) as run:
+            if run:
+                runs.append(name)
+            if hold:
+                release.wait(10)
+
+    first = threading.Thread(target=request, args=("first", True))
+    first.start()
+    while not runs:
+        time.sleep(0.01)
+    # Both wait for the first run, the one that gets the lock next does the
+    # work of both
+    waiting = [threading.Thread(target=request, args=(n,)) for n in "ab"]
+    for thread in waiting:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in [first, *waiting]:
+        thread.join()
+    assert len(runs) == 2
+    # A request made after the last run started runs again
+    request("later")
+    assert runs[-1] == "later"
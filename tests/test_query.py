@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pytest
+
+from expense_tracker.query import Query, load_transactions
+from expense_tracker.utils.storage import get_storage
+
+FILTERS = [
+    {},
+    {"start": "2025-01-10"},
+    {"end": "2025-02-01"},
+    {"start": "2025-01-04", "end": "2025-03-01"},
+    {"banks": ["Chase", "WellsFargo"]},
+    {"cards": [1234]},
+    {"categories": ["Groceries"]},
+    {"categories": ["Uncategorized", "Gas"]},
+    {"min_amount": 3500},
+    {"max_amount": 1999},
+    {"min_amount": 850, "max_amount": 4520, "banks": ["Chase", "CapitalOne"]},
+    {"description": "whole foods"},
+    {"description": "café"},
+    {"description": "100%"},
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=repr)
+def test_pushdown_matches_the_filters(dataset, transactions, filters):
+    """
+    Every backend returns the rows the filters select from the whole data.
+    """
+    query = Query(**filters)
+    expected = query.apply(transactions).sort_values(by=["Date", "Description"])
+    data = query.load(dataset)
+    assert sorted(data["ID"]) == sorted(expected["ID"])
+    assert data["Date"].is_monotonic_increasing
+    assert data["Amount"].sum() == expected["Amount"].sum()
+
+
+def test_load_columns(dataset):
+    data = load_transactions(
+        dataset, columns=["Amount"], storage=get_storage(), banks=["CapitalOne"]
+    )
+    assert list(data.columns) == ["Amount"]
+    assert sorted(data["Amount"]) == [850, 12000]
+
+
+def test_sql_filters():
+    where, params = Query(
+        start="2025-01-01", categories=["Uncategorized"], description="5%_"
+    ).sql()
+    assert where == (
+        "Date >= ? AND (Category IN (?) OR Category IS NULL) "
+        "AND Description LIKE ? ESCAPE '\\' AND (Type IS NULL OR Type != ?)"
+    )
+    assert params == ["2025-01-01", "Uncategorized", "%5\\%\\_%", "Transfer"]
+    assert Query(transfers=True).sql() == ("1", [])
+
+
+def test_transfers_are_left_out(tmp_path, monkeypatch, backend, transactions):
+    monkeypatch.chdir(tmp_path)
+    dataset = Path("data") / "global_aggregate"
+    types = [None, "Sale", None, "Transfer", None, "Transfer", None]
+    get_storage().write(dataset, transactions.assign(Type=types))
+    spending = Query().load(dataset)
+    assert len(spending) == 5
+    assert "Transfer" not in spending["Type"].tolist()
+    assert len(Query(transfers=True).load(dataset)) == 7
+    assert len(Query(banks=["WellsFargo"]).load(dataset, columns=["Amount"])) == 2
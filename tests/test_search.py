@@ -0,0 +1,102 @@
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from expense_tracker import main
+from expense_tracker.query import Query
+from expense_tracker.search import SearchIndex
+from expense_tracker.utils.storage import get_storage
+
+
+@pytest.fixture
+def index(dataset) -> SearchIndex:
+    return SearchIndex(dataset, get_storage())
+
+
+def test_search_matches_word_prefixes(index):
+    assert index.search("whole foods")["Description"].tolist() == [
+        "WHOLE FOODS MKT #7",
+        "WHOLE FOODS MARKET #12",
+    ]
+    assert len(index.search("amaz")) == 2
+    # Case and accents are folded
+    assert index.search("cafe du")["Description"].tolist() == ["Café Du Monde"]
+    assert index.search("whole amazon").empty
+
+
+def test_search_pages_newest_first(index):
+    results = index.search("o")
+    assert results["Date"].is_monotonic_decreasing
+    page = index.search("o", limit=2, offset=1)
+    assert page["ID"].tolist() == results["ID"].iloc[1:3].tolist()
+
+
+def test_search_with_query_filters(index):
+    results = index.search("whole", Query(banks=["Chase"]))
+    assert results["Bank"].astype(str).tolist() == ["Chase"]
+    results = index.search("amazon", Query(categories=["Uncategorized"]))
+    assert results["Description"].tolist() == ["AMAZON.COM"]
+
+
+def test_totals(index, transactions):
+    totals = index.totals("shell")
+    assert totals[["Count", "Amount"]].values.tolist() == [[2, 12020]]
+    by_bank = index.totals("whole foods", by=["Bank"])
+    assert by_bank.values.tolist() == [["CapitalOne", 1, 12000], ["Chase", 1, 4520]]
+    with pytest.raises(ValueError):
+        index.totals("shell", by=["Description"])
+
+
+@pytest.mark.parametrize("text", ["&", "-", "#", "  "])
+def test_search_without_words(index, text):
+    assert index.search(text).empty
+    totals = index.totals(text)
+    assert totals[["Count", "Amount"]].values.tolist() == [[0, 0]]
+    assert index.totals(text, by=["Month"]).empty
+
+
+def test_report_query_search_without_words(dataset, capsys):
+    main.report_query(Query(), search="&")
+    assert capsys.readouterr().out == ""
+
+
+def test_index_follows_the_dataset(index, dataset, transactions):
+    assert len(index.search("shell")) == 2
+    # Rows added by a writer that knows the index's version
+    base = index.storage.version(dataset)
+    row = transactions.iloc[[0]].assign(ID="new", Date=pd.Timestamp("2025-04-01"))
+    index.storage.write(dataset, pd.concat([transactions, row], ignore_index=True))
+    index.add(row, base)
+    assert index.search("whole")["ID"].iloc[0] == "new"
+    # A write the index missed is picked up by a rebuild
+    index.storage.write(dataset, transactions.iloc[:2])
+    assert index.search("whole")["ID"].tolist() == [transactions["ID"].iloc[0]]
+
+
+def test_transfers_are_left_out(tmp_path, monkeypatch, backend, transactions):
+    monkeypatch.chdir(tmp_path)
+    dataset = Path("data") / "global_aggregate"
+    types = [None] * 6 + ["Transfer"]
+    get_storage().write(dataset, transactions.assign(Type=types))
+    index = SearchIndex(dataset, get_storage())
+    assert index.totals("shell")[["Count", "Amount"]].values.tolist() == [[1, 6010]]
+    totals = index.totals("shell", Query(transfers=True))
+    assert totals[["Count", "Amount"]].values.tolist() == [[2, 12020]]
+
+
+def test_index_without_types_is_rebuilt(index, dataset):
+    # An index made before Type was indexed, at the dataset's version
+    with sqlite3.connect(index.index_file) as conn:
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value)")
+        conn.execute(
+            "CREATE TABLE transactions (rowid INTEGER PRIMARY KEY, ID TEXT UNIQUE, "
+            "Date TEXT, Description TEXT, Category TEXT, Amount INTEGER, Card, "
+            "Bank TEXT)"
+        )
+        conn.execute(
+            "INSERT INTO meta VALUES ('version', ?)",
+            (index.storage.version(dataset),),
+        )
+    assert len(index.search("shell")) == 2
@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+from expense_tracker.utils.specs import BANK_SPECS, BankSpec, get_spec, register
+
+
+def test_transfers_are_flagged():
+    spec = get_spec("WellsFargo", "AccountActivity")
+    raw = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2025-03-01", "2025-03-02", "2025-03-03"]),
+            "Amount": [-250.0, -42.10, 250.0],
+            "0": "*",
+            "1": "",
+            "Description": [
+                "CHASE CREDIT CRD AUTOPAY",
+                "SAFEWAY #1234",
+                "ONLINE PAYMENT THANK YOU",
+            ],
+        }
+    )
+    checking = spec.normalizer(raw.copy(), card=5772)
+    assert checking["Amount"].tolist() == [25000, 4210, -25000]
+    assert checking["Type"].eq("Transfer").tolist() == [True, False, True]
+    # The checking transfer rule only applies to the checking account
+    card = spec.normalizer(raw.copy(), card=9992)
+    assert card["Type"].eq("Transfer").tolist() == [False, False, True]
+    # Chunks without transfers have the column too
+    assert spec.normalizer(raw.iloc[[1]].copy(), card=9992)["Type"].isna().all()
+
+
+def test_bank_types_are_kept():
+    spec = get_spec("Chase", "AccountActivity")
+    raw = pd.DataFrame(
+        {
+            "Transaction Date": pd.to_datetime(["2025-03-01", "2025-03-02"]),
+            "Post Date": pd.to_datetime(["2025-03-02", "2025-03-03"]),
+            "Description": ["Payment Thank You-Mobile", "STARBUCKS STORE 4521"],
+            "Category": [None, "Food & Drink"],
+            "Type": ["Payment", "Sale"],
+            "Amount": [1200.0, -5.75],
+            "Memo": None,
+        }
+    )
+    df = spec.normalizer(raw, card=9088)
+    assert df["Type"].tolist() == ["Transfer", "Sale"]
+    assert df["Amount"].tolist() == [-120000, 575]
+
+
+def test_cards_from_file_names():
+    chase = get_spec("Chase", "AccountActivity").normalizer
+    assert chase.card_from_name("Chase9088_Activity20250101.CSV") == 9088
+    wells_fargo = get_spec("WellsFargo", "AccountActivity").normalizer
+    assert wells_fargo.card_from_name("0001 ActiveCash.csv") == 4031
+    assert wells_fargo.card_from_name("Checking1.csv") == 5772
+    assert wells_fargo.card_from_name("unknown.csv") == 0
+
+
+def test_normalizer_maps_exports_onto_the_schema():
+    spec = get_spec("CapitalOne", "AccountActivity")
+    raw = pd.DataFrame(
+        {
+            "Date": pd.to_datetime(["2025-03-02", "2025-03-01", "2025-03-01"]),
+            "Post Date": pd.to_datetime(["2025-03-03", "2025-03-02", "2025-03-02"]),
+            "Card": ["Quicksilver ...1234", "Venture ...9876", "Venture"],
+            "Description": ["TARGET", "SAFEWAY", "AMAZON"],
+            "Category": ["Shopping", "Groceries", "Shopping"],
+            "Amount": [19.99, "1,204.10", -5.0],
+        }
+    )
+    df = spec.normalizer(raw)
+    assert "Post Date" not in df.columns
+    assert df["Description"].tolist() == ["AMAZON", "SAFEWAY", "TARGET"]
+    # Charges are positive in Capital One exports
+    assert df["Amount"].tolist() == [-500, 120410, 1999]
+    assert df["Card"].tolist() == [0, 9876, 1234]
+    assert (df["Bank"] == "CapitalOne").all()
+
+
+def test_registered_specs_are_used_by_their_parsers():
+    with pytest.raises(ValueError):
+        get_spec("Monzo", "AccountActivity")
+    with pytest.raises(ValueError):
+        get_spec("Chase", "Statements")
+    spec = register(BankSpec("Monzo", "AccountActivity", card_names={".": 1}))
+    try:
+        assert get_spec("Monzo", "AccountActivity") is spec
+        assert spec.parser == "utils.parser:SpecParser"
+        assert spec.read_options() == {"parse_dates": ["Date"], "header": 0}
+        raw = pd.DataFrame(
+            {"Date": pd.to_datetime(["2025-03-01"]), "Description": ["X"]}
+        )
+        df = spec.normalizer(raw.assign(Amount=["-3.50"]), card=1)
+        assert df[["Amount", "Card"]].values.tolist() == [[350, 1]]
+    finally:
+        del BANK_SPECS["Monzo"]
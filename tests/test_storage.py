@@ -0,0 +1,71 @@
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from expense_tracker.query import Query
+from expense_tracker.utils.storage import SQLiteStorage, get_storage
+
+
+def test_amounts_round_trip_as_cents(dataset, transactions, backend):
+    storage = get_storage()
+    data = storage.read(dataset)
+    assert data["Amount"].dtype == np.int64
+    assert dict(zip(data["ID"], data["Amount"])) == dict(
+        zip(transactions["ID"], transactions["Amount"])
+    )
+    assert data["Amount"].sum() == 34889
+    location = storage.location(dataset)
+    if backend == "tsv":
+        # The TSVs stay readable, in dollars with at most two decimals
+        stored = pd.read_csv(location, sep="\t", dtype=str)["Amount"]
+        assert stored.str.fullmatch(r"-?\d+(\.\d{1,2})?").all()
+    elif backend == "sqlite":
+        with sqlite3.connect(location) as conn:
+            kinds = conn.execute("SELECT DISTINCT typeof(Amount) FROM transactions")
+            assert kinds.fetchall() == [("integer",)]
+
+
+def test_upsert(dataset, transactions):
+    storage = get_storage()
+    update = transactions.iloc[[4]].assign(Category="Shopping")
+    new = transactions.iloc[[0]].assign(ID="new", Date=pd.Timestamp("2025-01-01"))
+    storage.upsert(dataset, pd.concat([update, new], ignore_index=True))
+    data = storage.read(dataset)
+    assert len(data) == len(transactions) + 1
+    assert data.loc[data["ID"] == "new", "Date"].tolist() == [
+        pd.Timestamp("2025-01-01")
+    ]
+    categories = dict(zip(data["ID"], data["Category"]))
+    assert categories[update["ID"].iloc[0]] == "Shopping"
+
+
+def test_append(dataset, transactions):
+    storage = get_storage()
+    row = transactions.iloc[[5]].assign(ID="new", Date=pd.Timestamp("2025-04-01"))
+    storage.append(dataset, row.drop(columns=["Category"]))
+    data = storage.read(dataset)
+    assert len(data) == len(transactions) + 1
+    added = data[data["ID"] == "new"]
+    assert added["Amount"].tolist() == [6010]
+    assert added["Category"].isna().all()
+    with pytest.raises(ValueError):
+        storage.append(dataset, row.assign(Note="extra"))
+    assert len(storage.read(dataset)) == len(transactions) + 1
+
+
+def test_sqlite_tables_get_new_columns(tmp_path, monkeypatch, transactions):
+    monkeypatch.chdir(tmp_path)
+    storage = SQLiteStorage()
+    dataset = Path("data") / "global_aggregate"
+    # A table created before Type was part of the schema
+    storage.location(dataset).parent.mkdir(parents=True)
+    with sqlite3.connect(storage.location(dataset)) as conn:
+        conn.execute(
+            "CREATE TABLE transactions (ID TEXT PRIMARY KEY, Date TEXT, "
+            "Description TEXT, Amount INTEGER, Card, Bank TEXT, Category TEXT)"
+        )
+    storage.upsert(dataset, transactions)
+    assert len(Query().load(dataset, storage=storage)) == len(transactions)
@@ -0,0 +1,111 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from expense_tracker.utils.streaming import (
+    align_chunks,
+    drop_duplicate_ids,
+    merge_sorted,
+    sort_chunk,
+)
+
+
+def frame(rows: list[tuple]) -> pd.DataFrame:
+    """
+    Transactions from (date, description, ID, source) tuples.
+    """
+    df = pd.DataFrame(rows, columns=["Date", "Description", "ID", "Source"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+
+def blocks(df: pd.DataFrame, size: int) -> list[pd.DataFrame]:
+    return [df.iloc[i : i + size] for i in range(0, len(df), size)]
+
+
+def merged(sources: list[list[pd.DataFrame]]) -> pd.DataFrame:
+    out = list(drop_duplicate_ids(merge_sorted(sources)))
+    if not out:
+        return frame([])
+    return pd.concat(out, ignore_index=True)
+
+
+def test_ties_keep_source_order():
+    first = frame([("2025-01-02", "COFFEE", "a", 0), ("2025-01-02", "COFFEE", "b", 0)])
+    second = frame([("2025-01-01", "TEA", "c", 1), ("2025-01-02", "COFFEE", "d", 1)])
+    out = merged([[first], [second]])
+    assert out["ID"].tolist() == ["c", "a", "b", "d"]
+
+
+def test_duplicate_ids_keep_the_earlier_source():
+    aggregate = frame([("2025-01-02", "COFFEE", "a", 0)])
+    run = frame([("2025-01-02", "COFFEE", "a", 1), ("2025-01-03", "TEA", "b", 1)])
+    out = merged([[aggregate], [run]])
+    assert out["ID"].tolist() == ["a", "b"]
+    assert out["Source"].tolist() == [0, 1]
+
+
+def test_empty_sources_and_blocks():
+    df = frame([("2025-01-01", "TEA", "a", 0), ("2025-01-02", "COFFEE", "b", 0)])
+    empty = frame([])
+    sources = [[], [empty], [empty, df.iloc[:1], empty, df.iloc[1:], empty]]
+    assert merged(sources)["ID"].tolist() == ["a", "b"]
+    assert merged([]).empty
+    assert merged([[], [empty]]).empty
+
+
+def test_duplicate_ids_across_blocks():
+    # The IDs of a date split over single-row blocks, repeated in the next
+    # block, by another source and within its block
+    rows = [("2025-01-02", "COFFEE", "a", 0), ("2025-01-02", "COFFEE", "b", 0)]
+    rows += [("2025-01-02", "COFFEE", "b", 0), ("2025-01-02", "TEA", "c", 0)]
+    rows += [("2025-01-03", "TEA", "d", 0)]
+    other = [("2025-01-02", "COFFEE", "a", 1), ("2025-01-02", "TEA", "c", 1)]
+    other += [("2025-01-02", "TEA", "c", 1), ("2025-01-03", "TEA", "e", 1)]
+    out = merged([blocks(frame(rows), 1), [frame(other)]])
+    assert out["ID"].tolist() == ["a", "b", "c", "d", "e"]
+    assert out["Source"].tolist() == [0, 0, 0, 0, 1]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_merge_matches_a_full_sort(seed):
+    rng = random.Random(seed)
+    sources, frames = [], []
+    for source in range(rng.randint(1, 5)):
+        rows = []
+        for _ in range(rng.randint(0, 40)):
+            date = f"2025-01-{rng.randint(1, 5):02d}"
+            description = rng.choice(["COFFEE", "TEA", "BOOKS", np.nan])
+            # IDs are content hashes, so repeated IDs share a date
+            rows.append(
+                (date, description, f"{date}-{description}-{rng.randint(0, 2)}", source)
+            )
+        df = sort_chunk(frame(rows))
+        frames.append(df)
+        sources.append(blocks(df, rng.randint(1, 7)))
+    expected = sort_chunk(pd.concat(frames, ignore_index=True))
+    expected = expected[~expected["ID"].duplicated()].reset_index(drop=True)
+    out = merged(sources)
+    # Rows that tie on the sort key may come in another order
+    pd.testing.assert_frame_equal(
+        out[["Date", "Description"]],
+        expected[["Date", "Description"]],
+        check_dtype=False,
+    )
+    assert dict(zip(out["ID"], out["Source"])) == dict(
+        zip(expected["ID"], expected["Source"])
+    )
+
+
+def test_align_chunks_keeps_dates_together():
+    dates = ["2025-01-03"] * 3 + ["2025-01-02"] * 4 + ["2025-01-01"]
+    df = pd.DataFrame({"Date": dates, "Amount": range(len(dates))})
+    chunks = list(align_chunks(blocks(df, 2), "Date"))
+    assert [chunk["Date"].unique().tolist() for chunk in chunks] == [
+        ["2025-01-03"],
+        ["2025-01-02"],
+        ["2025-01-01"],
+    ]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df)
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from expense_tracker.utils.text_ops import (
+    has_legacy_ids,
+    transaction_ids,
+    upgrade_legacy_ids,
+)
+
+
+def frame(rows: list[tuple]) -> pd.DataFrame:
+    """
+    Transactions from (date, description, amount, card, bank) tuples.
+    """
+    df = pd.DataFrame(rows, columns=["Date", "Description", "Amount", "Card", "Bank"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+
+ROWS = [
+    ("2025-03-01", "SAFEWAY #1234", 4210, 9992, "WellsFargo"),
+    ("2025-03-01", "STARBUCKS STORE 4521", 575, 9088, "Chase"),
+    ("2025-03-01", "STARBUCKS STORE 4521", 575, 9088, "Chase"),
+    ("2025-03-02", "STARBUCKS STORE 4521", 575, 9088, "Chase"),
+]
+
+
+def test_ids_are_content_hashes():
+    ids = transaction_ids(frame(ROWS))
+    assert len(set(ids)) == 4
+    assert all(len(i) == 16 for i in ids)
+    assert not has_legacy_ids(pd.DataFrame({"ID": ids})).any()
+    # The same rows get the same IDs in any export, whatever the padding and
+    # case of the description
+    again = frame(
+        [ROWS[1], ROWS[2], ("2025-03-01", " safeway  #1234", 4210, 9992, "WellsFargo")]
+    )
+    assert list(transaction_ids(again)) == [ids[1], ids[2], ids[0]]
+
+
+def test_ids_depend_on_every_field():
+    base = transaction_ids(frame(ROWS[:1]))[0]
+    for i, value in enumerate(["2025-03-02", "SAFEWAY #1235", 4211, 9993, "Chase"]):
+        row = list(ROWS[0])
+        row[i] = value
+        assert transaction_ids(frame([tuple(row)]))[0] != base
+
+
+def test_legacy_ids_are_upgraded():
+    df = frame(ROWS)
+    df["ID"] = transaction_ids(df)
+    # Rows re-added with new random IDs by earlier versions
+    legacy = frame(ROWS[:2] + ROWS[:1]).assign(ID=["A1B2C3", "XYZ", "Q9"])
+    upgraded = upgrade_legacy_ids(pd.concat([df.iloc[2:], legacy], ignore_index=True))
+    assert sorted(upgraded["ID"]) == sorted(df["ID"].iloc[[2, 3, 0, 1]])
+    assert upgrade_legacy_ids(df) is df
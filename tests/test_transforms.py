@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from expense_tracker.utils.transforms import (
+    format_currency,
+    last_digits,
+    parse_amounts,
+    to_cents,
+    to_dollars,
+)
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        (["12.50", "0.07", "-3"], [12.5, 0.07, -3.0]),
+        (["1,234.56", "$12.00", " 7.10 ", "", " "], [1234.56, 12.0, 7.1, 0.0, 0.0]),
+        (["4.20", None, np.nan], [4.2, 0.0, 0.0]),
+        ([19.99, np.nan], [19.99, 0.0]),
+    ],
+)
+def test_parse_amounts(values, expected):
+    series = pd.Series(values, index=range(10, 10 + len(values)))
+    parsed = parse_amounts(series)
+    assert parsed.tolist() == expected
+    assert parsed.index.equals(series.index)
+
+
+def test_parse_amounts_rejects_text():
+    with pytest.raises(ValueError):
+        parse_amounts(pd.Series(["12.00", "n/a"]))
+
+
+def test_last_digits():
+    cards = pd.Series(
+        ["Quicksilver ...1234", "Venture", "1234", " Savor ...0042 ", None]
+    )
+    assert last_digits(cards).tolist() == [1234, 0, 0, 42, 0]
+
+
+def test_format_currency():
+    cents = pd.Series([0, 5, -5, 99999, 100000, -123456789, 10**17], index=range(3, 10))
+    formatted = format_currency(cents)
+    assert formatted.tolist() == [
+        "$0.00",
+        "$0.05",
+        "$-0.05",
+        "$999.99",
+        "$1,000.00",
+        "$-1,234,567.89",
+        "$1,000,000,000,000,000.00",
+    ]
+    assert formatted.index.equals(cents.index)
+    assert format_currency(pd.Series([150, None], dtype="Int64")).tolist() == [
+        "$1.50",
+        "",
+    ]
+    assert format_currency(pd.Series([], dtype=np.int64)).empty
+
+
+def test_to_cents_is_exact():
+    # 0.1 + 0.2 != 0.3 in float dollars
+    cents = to_cents(pd.Series(["0.10", "0.20", "1,234.57", " ", "-0.29"]))
+    assert cents.dtype == np.int64
+    assert cents.tolist() == [10, 20, 123457, 0, -29]
+    assert cents.iloc[:2].sum() == 30
+    assert to_cents(pd.Series([0.29, 1234.56, np.nan])).tolist() == [29, 123456, 0]
+    assert to_dollars(pd.Series([123457, -29])).tolist() == [1234.57, -0.29]